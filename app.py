@@ -1,34 +1,87 @@
+import asyncio
 import datetime
 import logging
+import math
 import os
 import json
 import secrets
-import httpx  # Remplace requests
+import time
 import socketio
+from collections import deque
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException, status, Depends, Form
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse, RedirectResponse, Response
+from fastapi.responses import (
+    FileResponse,
+    JSONResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
 from dotenv import load_dotenv
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
-from database import *
 
-# Charge les variables d'environnement
+# Charge les variables d'environnement (avant les modules qui lisent leur configuration à l'import)
 load_dotenv()
 
+from database import *
+from archive import get_archived_page
+from checkpoint import install_drain_handlers, load_snapshot, save_snapshot
+from log_config import hot_logger, log_stats, setup_logging
+from outbound import outbound
+from loop_monitor import MAX_STALLS, READY_MAX_LAG, loop_watchdog
+from relay import RELAY_UPSTREAM, UpstreamRelay
+from speech_session import speech_token, start_latencies
+from translation import INTERIM_TRANSLATION_INTERVAL, translation_stage
+from ratelimit import (
+    AdmissionRejected,
+    client_ip,
+    connect_admission,
+    connect_limiter,
+    environ_client_ip,
+    limiter_stats,
+    login_limiter,
+    token_limiter,
+    with_jitter,
+)
+
 # Configuration
 SPEECH_KEY = os.environ.get("SPEECH_KEY")
 SPEECH_REGION = os.environ.get("SPEECH_REGION")
 MASTER_PASSWORD = os.environ.get("MASTER_PASSWORD", "admin")
 DB_FILE = "storage/transcript_history.json"
 DEV_MODE = os.environ.get("DEV_MODE", "False") == "True"
+# Nombre de messages gardés en mémoire et envoyés aux clients à la connexion.
+# Un viewer qui se connecte ne reçoit que ces derniers messages de la conversation en
+# cours (les plus anciens restent en base, consultables depuis le master)
+HISTORY_WINDOW = int(os.environ.get("HISTORY_WINDOW", "1000"))
+# Fenêtre (s) sur laquelle les clients étalent leur reconnexion lors d'un redémarrage
+DRAIN_WINDOW = float(os.environ.get("DRAIN_WINDOW", "5"))
+
+
+def _env_list(name: str, default: str) -> list[str]:
+    return [item.strip() for item in os.environ.get(name, default).split(",") if item.strip()]
+
+
+# Langues cibles (codes Azure) et langues sources candidates pour l'auto-détection
+LANGUAGES = _env_list("TARGET_LANGUAGES", "fr,es")
+SOURCE_LANGUAGES = _env_list("SOURCE_LANGUAGES", "fr-FR,es-MX")
+# Langues traduites côté serveur (translation.py), sans cible de plus pour le recognizer
+EXTRA_LANGUAGES = [lang for lang in _env_list("EXTRA_LANGUAGES", "") if lang not in LANGUAGES]
+# Langues proposées aux viewers
+DISPLAY_LANGUAGES = LANGUAGES + EXTRA_LANGUAGES
+LANGUAGE_LABELS = {
+    "fr": "Français 🇫🇷",
+    "es": "Español 🇲🇽",
+    "en": "English 🇬🇧",
+    "de": "Deutsch 🇩🇪",
+    "it": "Italiano 🇮🇹",
+    "pt": "Português 🇵🇹",
+}
 
+setup_logging(logging.DEBUG if DEV_MODE else logging.INFO)
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG if DEV_MODE else logging.INFO)
-_handler = logging.StreamHandler()
-_handler.setLevel(logging.DEBUG if DEV_MODE else logging.INFO)
-logger.addHandler(_handler)
 
 # Configuration de sécurité pour les sessions
 # Génère une clé secrète si elle n'existe pas (à définir en production via .env)
@@ -42,46 +95,259 @@ serializer = URLSafeTimedSerializer(SECRET_KEY)
 # --- CONFIGURATION FASTAPI & SOCKETIO ---
 
 CURRENT_SESSION_ID = 1
-history = []
+history = deque(maxlen=HISTORY_WINDOW)
+# Levé une fois la fenêtre d'historique chargée (en tâche de fond après le démarrage)
+history_loaded = asyncio.Event()
+# Id du prochain message final : attribué avant la diffusion (qui précède la sauvegarde),
+# les clients s'en servent comme numéro de séquence pour leur cache local
+next_message_id = 1
+# Passe à True au signal d'arrêt : /readyz répond 503 pendant le drain
+draining = False
+# Dernier résultat intermédiaire diffusé (phrase en cours), None après un final
+live_interim = None
+# Chargement de l'historique en tâche de fond (référence gardée : la boucle
+# ne garde les tâches que faiblement)
+history_task = None
+# Client vers le serveur amont en mode relais (RELAY_UPSTREAM), sinon None
+upstream = None
+# Traductions serveur de la phrase en cours, reprises par les intermédiaires suivants
+interim_extra = {}
+interim_task = None
+interim_translated_at = 0.0
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    global CURRENT_SESSION_ID, history
+    outbound.start(sio)
+    if RELAY_UPSTREAM:
+        start_relay()
+    else:
+        await start_origin()
+    install_drain_handlers(drain_clients)
+    loop_watchdog.start()
+    yield
+    await outbound.stop()
+    loop_watchdog.stop()
+    await translation_stage.stop()
+    if upstream is not None:
+        await upstream.stop()
+    elif history_loaded.is_set():
+        # Shutdown : état live sauvegardé pour le prochain démarrage
+        # (pas d'historique partiel si l'arrêt survient pendant son chargement)
+        save_snapshot(live_state_snapshot())
+    # Les threads aiosqlite empêcheraient le processus de se terminer
+    await dispose_engine()
+
+
+async def start_origin():
+    """Démarrage normal : état live repris du snapshot, sinon de la base"""
+    global CURRENT_SESSION_ID, history_task
+    if EXTRA_LANGUAGES:
+        translation_stage.start(EXTRA_LANGUAGES)
     await init_db()
-    # Optionnel : Créer une session par défaut si aucune n'existe
-    convs = await get_conversations()
-    if not convs:
-        success, new_conv = await start_new_conversation()
-        print(
-            f"Aucune session trouvé, création d'une nouvelle sessions, id:{CURRENT_SESSION_ID}"
-        )
+    if await restore_live_state():
+        history_loaded.set()
     else:
+        # Une seule ligne lue : la dernière conversation, s'il y en a une
         last_conv = await get_last_conversation()
-        CURRENT_SESSION_ID = last_conv.id
-        messages = await get_messages_by_conversation(CURRENT_SESSION_ID)
-        history = [
+        if last_conv is None:
+            await start_new_conversation()
+            history_loaded.set()
+            logger.info(
+                "Aucune session trouvée, création d'une nouvelle session, id:%s",
+                CURRENT_SESSION_ID,
+            )
+        else:
+            CURRENT_SESSION_ID = last_conv.id
+            # Historique chargé une fois le serveur à l'écoute : les connexions
+            # arrivées entre-temps attendent history_loaded dans subscribe
+            history_task = asyncio.create_task(load_history_window(last_conv))
+    await sync_message_sequence()
+
+
+async def load_history_window(conv):
+    """Charge les HISTORY_WINDOW derniers messages de la conversation en cours"""
+    global history
+    try:
+        messages = await get_last_messages(conv.id, HISTORY_WINDOW)
+        if conv.id != CURRENT_SESSION_ID:
+            return  # nouvelle conversation démarrée pendant le chargement
+        loaded = deque((msg.to_dict() for msg in messages), maxlen=HISTORY_WINDOW)
+        # Finals reçus pendant le chargement
+        last_id = loaded[-1]["id"] if loaded else 0
+        loaded.extend(msg for msg in history if msg["id"] > last_id)
+        history = loaded
+        logger.info(
+            "Chargement de la dernière session, id:%s, name:%s, messages:%d",
+            conv.id,
+            conv.title,
+            len(messages),
+        )
+    except Exception as e:
+        logger.error("Erreur lors du chargement de l'historique: %s", e)
+    finally:
+        history_loaded.set()
+
+
+# --- MODE RELAIS ---
+
+
+def start_relay():
+    """Pas de base ni de master : l'état live vient du serveur amont"""
+    global upstream
+    upstream = UpstreamRelay(
+        RELAY_UPSTREAM, DISPLAY_LANGUAGES, relay_history, relay_message, relay_update, relay_clear
+    )
+    upstream.start()
+    # Les viewers reçoivent l'historique (vide au départ) sans attendre l'amont
+    history_loaded.set()
+    logger.info("Mode relais, amont: %s", RELAY_UPSTREAM)
+
+
+def history_entry(message: dict) -> dict:
+    """Message diffusé -> entrée d'historique (même format que Message.to_dict)"""
+    return {
+        key: message[key]
+        for key in ("id", "translations", "timestamp", "source_language")
+    }
+
+
+async def relay_history(conversation_id: int, messages: list[dict], incremental: bool):
+    global CURRENT_SESSION_ID, history
+    if incremental:
+        # Reprise après coupure : les messages manquants, diffusés comme des finals
+        for msg in messages:
+            add_to_history(msg)
+            broadcast_message({**msg, "is_final": True, "conversation_id": conversation_id})
+        return
+    CURRENT_SESSION_ID = conversation_id
+    history = deque(messages, maxlen=HISTORY_WINDOW)
+    # Historique remplacé : chaque room locale recharge le sien
+    for room in list(language_rooms):
+        languages = room_languages(room)
+        await outbound.emit_control(
+            "load_history",
             {
-                "fr": msg.fr,
-                "es": msg.es,
-                "timestamp": msg.timestamp.isoformat(),
-                "source_language": msg.source_language,
-            }
-            for msg in messages
-        ]
-        print("HISTORY: ", history)
-        print(
-            f"Chargement de la dernière session, id:{CURRENT_SESSION_ID}, name:{last_conv.title}, messages:{len(messages)}"
+                "conversation_id": conversation_id,
+                "after_id": None,
+                "messages": [select_languages(msg, languages) for msg in history],
+            },
+            room=room,
         )
-    yield
-    # Shutdown (if needed)
+
+
+async def relay_message(data: dict):
+    global live_interim
+    broadcast_message(data)
+    if data.get("is_final"):
+        live_interim = None
+        add_to_history(history_entry(data))
+    else:
+        live_interim = data
+
+
+async def relay_update(data: dict):
+    merge_into_history(data)
+    broadcast_update(data)
+
+
+async def relay_clear(payload):
+    global CURRENT_SESSION_ID, history, live_interim
+    CURRENT_SESSION_ID = (payload or {}).get("conversation_id", CURRENT_SESSION_ID)
+    history = deque(maxlen=HISTORY_WINDOW)
+    live_interim = None
+    await outbound.emit_control("clear_screen", payload)
+
+
+# --- SAUVEGARDE / RESTAURATION DE L'ÉTAT LIVE ---
+
+
+def live_state_snapshot() -> dict:
+    return {
+        "conversation_id": CURRENT_SESSION_ID,
+        "last_seq": history[-1]["id"] if history else None,
+        "recognition_state": sid_registry["recognition_state"],
+        "interim": live_interim,
+        "history": list(history),
+    }
+
+
+async def restore_live_state() -> bool:
+    """
+    Reprend l'état du snapshot s'il correspond encore à la base
+    (même conversation, même dernier message), sinon False.
+    """
+    global CURRENT_SESSION_ID, history, live_interim
+    snapshot = load_snapshot()
+    if snapshot is None:
+        return False
+    last_conv = await get_last_conversation()
+    if last_conv is None or last_conv.id != snapshot["conversation_id"]:
+        return False
+    if await get_last_message_id(last_conv.id) != snapshot["last_seq"]:
+        return False
+
+    CURRENT_SESSION_ID = last_conv.id
+    history = deque(snapshot["history"], maxlen=HISTORY_WINDOW)
+    live_interim = snapshot["interim"]
+    sid_registry["recognition_state"] = snapshot["recognition_state"]
+    logger.info(
+        "Session restaurée depuis le snapshot, id:%s, messages:%d",
+        CURRENT_SESSION_ID,
+        len(history),
+    )
+    return True
+
+
+async def sync_message_sequence():
+    """
+    Recale le prochain id sur la base (ex: messages insérés par un autre processus),
+    sans jamais revenir en arrière : un id déjà diffusé n'est pas réattribué, même si
+    sa sauvegarde a échoué (les clients l'ont déjà en cache).
+    """
+    global next_message_id
+    _, max_message_id = await get_max_ids()
+    next_message_id = max(next_message_id, max_message_id + 1)
+
+
+def add_to_history(message: dict):
+    """
+    Ajoute un message final à l'historique en gardant l'ordre des ids (history_since
+    le parcourt à rebours) : deux finals sauvegardés en parallèle peuvent finir dans
+    le désordre.
+    """
+    index = len(history)
+    while index and history[index - 1]["id"] > message["id"]:
+        index -= 1
+    if index == len(history):
+        history.append(message)
+        return
+    if len(history) == history.maxlen:
+        if index == 0:
+            return  # plus ancien que toute la fenêtre
+        history.popleft()
+        index -= 1
+    history.insert(index, message)
+
+
+async def drain_clients():
+    """Prévient les clients du redémarrage : chacun tire un délai de reconnexion dans la fenêtre"""
+    global draining
+    draining = True
+    await outbound.emit_control("server_draining", {"reconnect_window": DRAIN_WINDOW})
 
 
 app = FastAPI(lifespan=lifespan)
 
 templates = Jinja2Templates(directory="templates")
 templates.env.globals["DEV_MODE"] = DEV_MODE
+templates.env.globals["LANGUAGES"] = LANGUAGES
+templates.env.globals["DISPLAY_LANGUAGES"] = DISPLAY_LANGUAGES
+templates.env.globals["SOURCE_LANGUAGES"] = SOURCE_LANGUAGES
+templates.env.globals["LANGUAGE_LABELS"] = {
+    lang: LANGUAGE_LABELS.get(lang, lang.upper()) for lang in DISPLAY_LANGUAGES
+}
 
 if not os.path.exists("static"):
     os.makedirs("static")
@@ -107,13 +373,14 @@ def parse_iso(ts: str | None) -> datetime:
 
 
 async def start_new_conversation():
-    global CURRENT_SESSION_ID, history
+    global CURRENT_SESSION_ID, history, live_interim
     try:
         title = f"Conversation du {datetime.now().strftime('%d/%m %H:%M')}"
         new_conv = await create_conversation(title=title)
         CURRENT_SESSION_ID = new_conv.id
-        history = []
-        await sio.emit("clear_screen")
+        history = deque(maxlen=HISTORY_WINDOW)
+        live_interim = None
+        await outbound.emit_control("clear_screen", {"conversation_id": new_conv.id})
     except:
         return False, CURRENT_SESSION_ID
     return True, new_conv.id
@@ -142,6 +409,18 @@ def get_session_token(request: Request) -> str | None:
     return request.cookies.get(SESSION_COOKIE_NAME)
 
 
+async def origin_only():
+    """
+    Dépendance FastAPI des routes de l'origine (master, base de données) : un relais
+    n'a pas de base, elles répondent 404 en indiquant le serveur amont.
+    """
+    if RELAY_UPSTREAM:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Relais : utiliser le serveur amont {RELAY_UPSTREAM}",
+        )
+
+
 async def require_auth(request: Request) -> bool:
     """Dépendance FastAPI pour vérifier l'authentification"""
     token = get_session_token(request)
@@ -167,6 +446,28 @@ def check_auth(request: Request) -> RedirectResponse | None:
     return None
 
 
+# --- LIMITATION DE DÉBIT ---
+
+
+def rate_limited(limiter):
+    """Dépendance FastAPI : un jeton par IP et par session, sinon 429 + Retry-After"""
+
+    async def dependency(request: Request):
+        ip = client_ip(
+            request.headers.get("x-forwarded-for", ""),
+            request.client.host if request.client else None,
+        )
+        retry_after = limiter.check(f"ip:{ip}", get_session_token(request))
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Trop de requêtes, réessayez plus tard",
+                headers={"Retry-After": str(math.ceil(with_jitter(retry_after)))},
+            )
+
+    return dependency
+
+
 # --- ROUTES HTTP (FastAPI) ---
 
 
@@ -180,7 +481,17 @@ async def viewer(request: Request):
     return templates.TemplateResponse("viewer.html", {"request": request})
 
 
-@app.get("/control")
+@app.get("/sw.js")
+async def service_worker():
+    """Service worker du viewer, servi à la racine pour pouvoir être enregistré sur /viewer"""
+    return FileResponse(
+        "static/js/sw.js",
+        media_type="application/javascript",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@app.get("/control", dependencies=[Depends(origin_only)])
 async def control(request: Request):
     """Page de télécommande pour contrôler la reconnaissance à distance"""
     return templates.TemplateResponse("control.html", {"request": request})
@@ -196,7 +507,7 @@ async def login_page(request: Request):
     return templates.TemplateResponse("login.html", {"request": request})
 
 
-@app.post("/api/login")
+@app.post("/api/login", dependencies=[Depends(rate_limited(login_limiter))])
 async def login(response: Response, password: str = Form(...)):
     """Endpoint d'authentification via POST"""
     if password != MASTER_PASSWORD:
@@ -227,7 +538,7 @@ async def logout(response: Response):
     return {"success": True, "message": "Déconnexion réussie"}
 
 
-@app.get("/master")
+@app.get("/master", dependencies=[Depends(origin_only)])
 async def master(request: Request):
     """Page maître protégée par authentification"""
     redirect = check_auth(request)
@@ -235,13 +546,51 @@ async def master(request: Request):
         return redirect
 
     convs_list = await get_conversation_list()
-    print("CONVS LIST: ", convs_list)
     return templates.TemplateResponse(
         "master.html", {"request": request, "convs_list": convs_list}
     )
 
 
-@app.get("/master/new")
+@app.get("/api/conversations", dependencies=[Depends(origin_only)])
+async def list_conversations(authenticated: bool = Depends(require_auth)):
+    """Liste des conversations avec leurs agrégats (nombre de messages, durée...)"""
+    return await get_conversation_list()
+
+
+@app.get(
+    "/api/conversations/{conversation_id}/messages", dependencies=[Depends(origin_only)]
+)
+async def conversation_messages(
+    conversation_id: int, authenticated: bool = Depends(require_auth)
+):
+    """
+    Messages d'une conversation en NDJSON (un message par ligne), page par page.
+    Lus depuis la base, ou depuis le fichier d'archive si la conversation a été archivée ;
+    les pages déjà servies viennent du cache de lecture.
+    """
+    conv = await get_conversation_by_id(conversation_id)
+    if conv is None:
+        raise HTTPException(status_code=404, detail="Conversation introuvable")
+
+    async def lines():
+        after_id = 0
+        while True:
+            if conv.archive_path:
+                body, last_id, count = await get_archived_page(
+                    conversation_id, conv.archive_path, after_id
+                )
+            else:
+                body, last_id, count = await get_message_page(conversation_id, after_id)
+            if body:
+                yield body
+            if count < MESSAGE_PAGE_SIZE:
+                break
+            after_id = last_id
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get("/master/new", dependencies=[Depends(origin_only)])
 async def new_conversation(request: Request):
     """Créer une nouvelle conversation (protégée)"""
     redirect = check_auth(request)
@@ -252,7 +601,10 @@ async def new_conversation(request: Request):
     return RedirectResponse(url="/master", status_code=303)
 
 
-@app.get("/api/get-token")
+@app.get(
+    "/api/get-token",
+    dependencies=[Depends(origin_only), Depends(rate_limited(token_limiter))],
+)
 async def get_azure_token():
     """
     Récupération asynchrone du token Azure.
@@ -260,25 +612,21 @@ async def get_azure_token():
     """
     if not SPEECH_KEY or not SPEECH_REGION:
         raise HTTPException(status_code=500, detail="Clés API manquantes côté serveur")
+    # Import différé : httpx ne sert qu'ici, inutile de le charger au démarrage
+    import httpx
 
-    fetch_token_url = (
-        f"https://{SPEECH_REGION}.api.cognitive.microsoft.com/sts/v1.0/issueToken"
-    )
-    headers = {"Ocp-Apim-Subscription-Key": SPEECH_KEY}
-
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(fetch_token_url, headers=headers)
-            response.raise_for_status()
-            return {"token": response.text, "region": SPEECH_REGION}
-        except httpx.RequestError as e:
-            print(f"Erreur réseau Azure: {e}")
-            raise HTTPException(status_code=500, detail="Erreur de connexion à Azure")
-        except httpx.HTTPStatusError as e:
-            print(f"Erreur HTTP Azure: {e}")
-            raise HTTPException(
-                status_code=500, detail="Impossible de générer le token"
-            )
+    # Token partagé et renouvelé en arrière-plan (speech_session.py) : pas
+    # d'aller-retour vers Microsoft tant qu'il reste assez frais
+    try:
+        return await speech_token.get()
+    except httpx.RequestError as e:
+        logger.error("Erreur réseau Azure: %s", e)
+        raise HTTPException(status_code=500, detail="Erreur de connexion à Azure")
+    except httpx.HTTPStatusError as e:
+        logger.error("Erreur HTTP Azure: %s", e)
+        raise HTTPException(
+            status_code=500, detail="Impossible de générer le token"
+        )
 
 
 async def get_connected_sockets_count() -> int:
@@ -287,11 +635,10 @@ async def get_connected_sockets_count() -> int:
     Utilise le manager de socketio pour compter les participants actifs.
     """
     try:
-        # Obtenir tous les participants dans le namespace par défaut '/'
-        participants = await sio.manager.get_participants("/", None)
-        return len(participants) if participants else 0
+        # Tous les participants du namespace par défaut '/' (itérable de (sid, eio_sid))
+        return sum(1 for _ in sio.manager.get_participants("/", None))
     except Exception as e:
-        print(f"Erreur lors du comptage des sockets: {e}")
+        logger.error("Erreur lors du comptage des sockets: %s", e)
         return 0
 
 
@@ -315,7 +662,7 @@ async def get_socket_statistics() -> dict:
             "timestamp": datetime.now().isoformat(),
         }
     except Exception as e:
-        print(f"Erreur lors de la récupération des statistiques: {e}")
+        logger.error("Erreur lors de la récupération des statistiques: %s", e)
         return {
             "total_connected": 0,
             "master_connected": False,
@@ -346,6 +693,125 @@ async def get_socket_stats():
     return stats
 
 
+@app.get("/healthz")
+async def healthz():
+    """Vivacité : répondre suffit à prouver que la boucle tourne"""
+    return {"status": "ok", "loop_lag_ms": round(loop_watchdog.lag * 1000, 1)}
+
+
+@app.get("/readyz")
+async def readyz():
+    """
+    Disponibilité pour le reverse proxy : 503 si la boucle a pris du retard,
+    si les écritures en base échouent (et que la base ne répond toujours pas
+    à une requête de test), pendant le drain d'un redémarrage ou,
+    pour un relais, tant que le serveur amont est injoignable.
+    Sans parcours des participants : le nombre de sockets vient d'engine.io.
+    """
+    loop = loop_watchdog.status(slowest=0)
+    db_ok = await write_health.probe()
+    db = write_health.to_dict()
+    ready = (
+        not draining
+        and loop_watchdog.max_lag <= READY_MAX_LAG
+        and db_ok
+        and (upstream is None or upstream.connected)
+    )
+    payload = {
+        "ready": ready,
+        "draining": draining,
+        "loop": loop,
+        "db_writer": db,
+        "sockets": len(sio.eio.sockets),
+        "viewer_count": sid_registry["viewer_count"],
+    }
+    if upstream is not None:
+        payload["relay"] = upstream.status()
+    return JSONResponse(payload, status_code=200 if ready else 503)
+
+
+@app.get("/api/loop-stalls")
+async def get_loop_stalls(authenticated: bool = Depends(require_auth)):
+    """Blocages de la boucle les plus longs, avec la pile du callback en cause"""
+    return loop_watchdog.status(slowest=MAX_STALLS)
+
+
+@app.get("/api/outbound-stats")
+async def get_outbound_stats(authenticated: bool = Depends(require_auth)):
+    """Émissions par voie (commandes, finals, intermédiaires) : envoyés, abandonnés, latence"""
+    return outbound.queue_stats()
+
+
+@app.get("/api/recognition-stats")
+async def get_recognition_stats(authenticated: bool = Depends(require_auth)):
+    """Latences de démarrage de la reconnaissance (session chaude / froide) et cache du token"""
+    return {"starts": start_latencies.stats(), "token": speech_token.stats()}
+
+
+@app.get("/api/translation-stats")
+async def get_translation_stats(authenticated: bool = Depends(require_auth)):
+    """Traduction serveur : taux de succès de la mémoire de traduction, taille et latence des lots"""
+    return translation_stage.stats()
+
+
+@app.get("/api/rate-limits")
+async def get_rate_limits(authenticated: bool = Depends(require_auth)):
+    """État des limiteurs de débit et de la file d'admission des connexions"""
+    return limiter_stats()
+
+
+@app.get("/api/log-stats")
+async def get_log_stats(authenticated: bool = Depends(require_auth)):
+    """File de logs : enregistrements en attente et abandonnés (file pleine)"""
+    return log_stats()
+
+
+@app.get("/api/cache-stats")
+async def get_cache_stats(authenticated: bool = Depends(require_auth)):
+    """Compteurs du cache de lecture (succès, échecs, octets occupés)"""
+    return query_cache.stats()
+
+
+@app.post("/api/admin/profiling/start")
+async def start_profiling(
+    duration: float = 60,
+    sample_rate: float = 1.0,
+    trace_malloc: bool = False,
+    authenticated: bool = Depends(require_auth),
+):
+    """
+    Active le profilage des handlers Socket.IO et des routes pour `duration` secondes
+    (600 max). `sample_rate` : part des appels chronométrés ; `trace_malloc` : suivi des allocations.
+    """
+    from profiling import profiler  # import différé : hors du chemin de démarrage
+
+    profiler.start(sio, app, duration, sample_rate, trace_malloc)
+    return profiler.status()
+
+
+@app.post("/api/admin/profiling/stop")
+async def stop_profiling(authenticated: bool = Depends(require_auth)):
+    from profiling import profiler
+
+    profiler.stop()
+    return profiler.status()
+
+
+@app.get("/api/admin/profiling/report")
+async def profiling_report(authenticated: bool = Depends(require_auth)):
+    """Rapport téléchargeable : temps par handler et principaux points d'allocation"""
+    from profiling import profiler
+
+    report = profiler.report()
+    if report is None:
+        raise HTTPException(status_code=404, detail="Aucun profilage effectué")
+    filename = f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    return JSONResponse(
+        {"status": profiler.status(), **report},
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @app.post("/api/sync-socket-count")
 async def sync_socket_count_endpoint():
     """
@@ -366,9 +832,85 @@ sid_registry = {
     "recognition_state": False,  # État de la reconnaissance (true = en cours)
 }
 
+# Une room Socket.IO par combinaison de langues affichées ("lang:es", "lang:es,fr"...)
+# room -> nombre de clients abonnés
+language_rooms: dict[str, int] = {}
+
+
+def language_room(languages) -> str:
+    return "lang:" + ",".join(sorted(languages))
+
+
+def room_languages(room: str) -> list[str]:
+    return room.removeprefix("lang:").split(",")
+
+
+def select_languages(message: dict, languages) -> dict:
+    """Copie du message ne contenant que les traductions demandées"""
+    payload = dict(message)
+    payload["translations"] = {
+        lang: text
+        for lang, text in message["translations"].items()
+        if lang in languages
+    }
+    return payload
+
+
+def extract_translations(data: dict) -> dict[str, str]:
+    """Traductions d'un message du master, une entrée par langue configurée"""
+    translations = data.get("translations")
+    if not isinstance(translations, dict):
+        # Ancien format du master : une clé par langue au premier niveau
+        translations = data
+    return {lang: translations.get(lang) or "" for lang in LANGUAGES}
+
+
+def broadcast_message(message: dict, skip_sid=None):
+    """
+    Envoie à chaque room uniquement les langues qu'elle affiche, via la voie
+    des finals ou celle des intermédiaires (abandonnables) : voir outbound.py
+    """
+    send = outbound.send_final if message["is_final"] else outbound.send_interim
+    for room in list(language_rooms):
+        payload = select_languages(message, room_languages(room))
+        # Intermédiaire sans aucune langue de la room (traduction serveur pas encore faite)
+        if not message["is_final"] and not payload["translations"]:
+            continue
+        send("display_message", payload, key=room, room=room, skip_sid=skip_sid)
+
+
+async def _leave_language_room(sid, room: str | None):
+    if not room:
+        return
+    await sio.leave_room(sid, room)
+    remaining = language_rooms.get(room, 0) - 1
+    if remaining > 0:
+        language_rooms[room] = remaining
+    else:
+        language_rooms.pop(room, None)
+
 
 @sio.event
 async def connect(sid, environ):
+    # Un relais ne sert que des viewers : master et télécommande vont sur l'origine
+    referer = environ.get("HTTP_REFERER", "")
+    if RELAY_UPSTREAM and ("/master" in referer or "/control" in referer):
+        raise socketio.exceptions.ConnectionRefusedError({"relay": RELAY_UPSTREAM})
+    # Un client en boucle de reconnexion est refusé avec un délai de retry étalé
+    ip = environ_client_ip(environ)
+    retry_after = connect_limiter.check(f"ip:{ip}")
+    if retry_after:
+        raise socketio.exceptions.ConnectionRefusedError(
+            {"retry_after": with_jitter(retry_after)}
+        )
+    try:
+        async with connect_admission.slot():
+            await _register_client(sid, environ)
+    except AdmissionRejected as e:
+        raise socketio.exceptions.ConnectionRefusedError({"retry_after": e.retry_after})
+
+
+async def _register_client(sid, environ):
     global history, sid_registry
     # Récupérer le Referer depuis environ
     referer = environ.get("HTTP_REFERER", "")
@@ -382,24 +924,30 @@ async def connect(sid, environ):
     else:
         client_type = "unknown"
 
-    print(f"Client connecté: {sid} depuis {client_type}")
+    hot_logger.info(
+        "Client connecté", extra={"sid": sid, "client_type": client_type}
+    )
 
     # Enregistrer le type de client (vous avez déjà sid_registry)
     if client_type == "master":
         sid_registry["master"] = sid
+        # Token prêt pour la prochaine commande de démarrage
+        speech_token.prefetch()
         # Envoyer l'état actuel au master
-        await sio.emit("recognition_state", sid_registry["recognition_state"], to=sid)
+        await outbound.emit_control(
+            "recognition_state", sid_registry["recognition_state"], to=sid
+        )
     elif client_type == "viewer":
         sid_registry["viewer_count"] += 1
     elif client_type == "control":
         sid_registry["control"] = sid
         # Envoyer l'état actuel au control
-        await sio.emit("recognition_state", sid_registry["recognition_state"], to=sid)
-
-    await sio.emit("load_history", history, to=sid)
+        await outbound.emit_control(
+            "recognition_state", sid_registry["recognition_state"], to=sid
+        )
 
     if sid_registry.get("master"):
-        await sio.emit(
+        await outbound.emit_control(
             "update_viewer_count",
             sid_registry["viewer_count"],
             to=sid_registry["master"],
@@ -410,6 +958,9 @@ async def connect(sid, environ):
 async def disconnect(sid):
     global sid_registry
     try:
+        session = await sio.get_session(sid)
+        await _leave_language_room(sid, session.get("room"))
+
         if sid == sid_registry.get("master"):
             sid_registry["master"] = None
         elif sid == sid_registry.get("control"):
@@ -421,17 +972,15 @@ async def disconnect(sid):
             )
             # Notifier le master si connecté
             if sid_registry.get("master"):
-                await sio.emit(
+                await outbound.emit_control(
                     "update_viewer_count",
                     sid_registry["viewer_count"],
                     to=sid_registry["master"],
                 )
 
-        # Afficher le nombre total de sockets restants (pour debug)
-        total_count = await get_connected_sockets_count()
-        print(f"Client déconnecté: {sid}. Sockets restants: {total_count}")
+        hot_logger.info("Client déconnecté", extra={"sid": sid})
     except Exception as e:
-        print(f"Erreur lors de la déconnexion: {e}")
+        logger.error("Erreur lors de la déconnexion: %s", e)
 
 
 async def sync_viewer_count():
@@ -447,8 +996,9 @@ async def sync_viewer_count():
         # Vérifier si le master est toujours connecté en vérifiant s'il est dans les participants
         is_master_connected = False
         if master_sid:
-            participants = await sio.manager.get_participants("/", None)
-            is_master_connected = participants and master_sid in participants
+            is_master_connected = any(
+                sid == master_sid for sid, _ in sio.manager.get_participants("/", None)
+            )
 
         # Si le master n'est plus connecté, le retirer du registre
         if master_sid and not is_master_connected:
@@ -460,101 +1010,302 @@ async def sync_viewer_count():
 
         # Mettre à jour le master si nécessaire
         if master_sid and is_master_connected:
-            await sio.emit(
+            await outbound.emit_control(
                 "update_viewer_count", sid_registry["viewer_count"], to=master_sid
             )
 
         return sid_registry["viewer_count"]
     except Exception as e:
-        print(f"Erreur lors de la synchronisation: {e}")
+        logger.error("Erreur lors de la synchronisation: %s", e)
         return sid_registry.get("viewer_count", 0)
 
 
+def history_since(conversation_id, after_id) -> tuple[list[dict], int | None]:
+    """
+    Messages de l'historique postérieurs à `after_id` (reprise depuis le cache du client),
+    ou tout l'historique avec after_id=None si la reprise n'est pas possible
+    (autre conversation, ou messages manquants hors de la fenêtre gardée en mémoire).
+    """
+    if conversation_id != CURRENT_SESSION_ID or not isinstance(after_id, int) or not history:
+        return list(history), None
+    window_full = len(history) == history.maxlen
+    if after_id > history[-1]["id"] or (window_full and after_id < history[0]["id"]):
+        return list(history), None
+    newer = []
+    for msg in reversed(history):
+        if msg["id"] <= after_id:
+            break
+        newer.append(msg)
+    newer.reverse()
+    return newer, after_id
+
+
 @sio.event
-async def new_translation(sid, data):
-    if (data.get("fr") or "").strip() == "" or (data.get("es") or "").strip() == "":
-        return
+async def subscribe(sid, data):
+    """
+    Le client indique les langues qu'il affiche : il rejoint la room correspondante
+    et reçoit l'historique limité à ces langues.
+    S'il a déjà en cache local la conversation en cours jusqu'au message `after_id`,
+    il ne reçoit que les messages suivants.
+    """
+    requested = (data or {}).get("languages") or DISPLAY_LANGUAGES
+    languages = sorted({lang for lang in requested if lang in DISPLAY_LANGUAGES}) or DISPLAY_LANGUAGES
+    room = language_room(languages)
 
-    # 1. Broadcast d'abord : les viewers doivent toujours recevoir (même si la sauvegarde échoue)
-    broadcast_data = data.copy()
-    broadcast_data["source_language"] = data.get("lang", "unknown")
-    broadcast_data["is_final"] = bool(data.get("is_final"))
-    await sio.emit("display_message", broadcast_data, skip_sid=sid)
+    session = await sio.get_session(sid)
+    if session.get("room") != room:
+        await _leave_language_room(sid, session.get("room"))
+        await sio.enter_room(sid, room)
+        language_rooms[room] = language_rooms.get(room, 0) + 1
+        await sio.save_session(sid, {"room": room})
 
-    # 2. Sauvegarde si final
-    if data.get("is_final"):
-        logger.info(f"receiving final message: {data}")
-        try:
-            await add_message(
-                conversation_id=CURRENT_SESSION_ID,
-                fr=data["fr"],
-                es=data["es"],
-                source_language=data.get("lang", "unknown"),
-                timestamp=parse_iso(data.get("timestamp")),
+    try:
+        # L'envoi de l'historique est la partie coûteuse d'une (re)connexion
+        async with connect_admission.slot():
+            await history_loaded.wait()
+            messages, after_id = history_since(
+                (data or {}).get("conversation_id"), (data or {}).get("after_id")
             )
-            logger.debug(f"Sauvegarde du message réussi dans: {CURRENT_SESSION_ID}")
-            history.append(
+            await sio.emit(
+                "load_history",
                 {
-                    "fr": data["fr"],
-                    "es": data["es"],
-                    "timestamp": data["timestamp"],
-                    "source_language": data.get("lang", "unknown"),
-                }
+                    "conversation_id": CURRENT_SESSION_ID,
+                    "after_id": after_id,
+                    "messages": [select_languages(msg, languages) for msg in messages],
+                },
+                to=sid,
             )
-        except Exception as e:
-            logger.error(f"Erreur lors de la sauvegarde: {e}")
+    except AdmissionRejected as e:
+        await sio.emit("subscribe_retry", {"retry_after": e.retry_after}, to=sid)
+        return
+
+    # Phrase en cours (ex: reprise après un redémarrage du serveur)
+    if live_interim is not None:
+        await sio.emit("display_message", select_languages(live_interim, languages), to=sid)
+
+
+@sio.event
+async def new_translation(sid, data):
+    global live_interim, next_message_id, interim_extra
+    # Un relais ne reçoit ses messages que de l'amont (pas de master, pas de base)
+    if RELAY_UPSTREAM:
+        return
+    translations = extract_translations(data)
+    if any(text.strip() == "" for text in translations.values()):
+        return
+
+    # 1. Broadcast d'abord : les viewers doivent toujours recevoir (même si la sauvegarde échoue)
+    broadcast_data = {
+        "translations": translations,
+        "timestamp": data.get("timestamp"),
+        "source_language": data.get("lang", "unknown"),
+        "is_final": bool(data.get("is_final")),
+        "conversation_id": CURRENT_SESSION_ID,
+    }
+    if broadcast_data["is_final"]:
+        broadcast_data["id"] = next_message_id
+        next_message_id += 1
+        live_interim = None
+        interim_extra = {}
+    elif interim_extra:
+        # Intermédiaire : dernières traductions serveur de la phrase, mises à jour en
+        # tâche de fond (les langues pas encore traduites sont absentes)
+        broadcast_data["translations"] = {**translations, **interim_extra}
+    broadcast_message(broadcast_data, skip_sid=sid)
+    if not broadcast_data["is_final"]:
+        live_interim = broadcast_data
+        if translation_stage.running:
+            schedule_interim_translation(broadcast_data, sid)
+        return
+
+    # Langues serveur (EXTRA_LANGUAGES) traduites pendant la sauvegarde, puis
+    # envoyées en complément du final déjà diffusé
+    extra_task = None
+    if translation_stage.running:
+        extra_task = asyncio.create_task(extra_translations(broadcast_data))
+
+    # 2. Sauvegarde du final
+    hot_logger.info(
+        "receiving final message",
+        extra={"conversation_id": CURRENT_SESSION_ID, "source_language": broadcast_data["source_language"]},
+    )
+    saved = False
+    try:
+        msg = await add_message(
+            conversation_id=CURRENT_SESSION_ID,
+            translations=translations,
+            source_language=data.get("lang", "unknown"),
+            timestamp=parse_iso(data.get("timestamp")),
+            message_id=broadcast_data["id"],
+        )
+        logger.debug("Sauvegarde du message réussi dans: %s", CURRENT_SESSION_ID)
+        add_to_history(msg.to_dict())
+        saved = True
+    except Exception as e:
+        logger.error("Erreur lors de la sauvegarde: %s", e)
+        # Ex: id déjà pris par une insertion d'un autre processus
+        await sync_message_sequence()
+
+    if extra_task is not None:
+        await complete_final(broadcast_data, await extra_task, saved)
+
+
+async def extra_translations(message: dict) -> dict[str, str]:
+    """Langues traduites côté serveur (EXTRA_LANGUAGES) disponibles pour le message"""
+    translations = message["translations"]
+    text = source_text(
+        {lang: translations[lang] for lang in LANGUAGES}, message["source_language"]
+    )
+    return await translation_stage.translate(
+        text, message["source_language"], remember=message["is_final"]
+    )
+
+
+def merge_into_history(update: dict):
+    """Ajoute les langues d'un complément au message de l'historique de même id"""
+    for index in range(len(history) - 1, -1, -1):
+        entry = history[index]
+        if entry["id"] == update["id"]:
+            history[index] = {
+                **entry, "translations": {**entry["translations"], **update["translations"]}
+            }
+            return
+        if entry["id"] < update["id"]:
+            return
+
+
+def broadcast_update(update: dict):
+    """
+    Complément d'un final déjà diffusé ({id, conversation_id, translations}) : envoyé,
+    sur la voie des finals et après eux, aux seules rooms qui affichent ces langues
+    """
+    for room in list(language_rooms):
+        payload = select_languages(update, room_languages(room))
+        if payload["translations"]:
+            outbound.send_final("update_message", payload, key=f"update:{room}", room=room)
+
+
+async def complete_final(message: dict, extras: dict[str, str], saved: bool):
+    """Diffuse puis sauvegarde les langues serveur d'un final (absentes si en échec)"""
+    if not extras:
+        return
+    update = {
+        "id": message["id"],
+        "conversation_id": message["conversation_id"],
+        "translations": extras,
+    }
+    merge_into_history(update)
+    broadcast_update(update)
+    if not saved:
+        return
+    try:
+        await add_translations(message["conversation_id"], message["id"], extras)
+    except Exception as e:
+        logger.error("Erreur lors de la sauvegarde des traductions serveur: %s", e)
+
+
+def schedule_interim_translation(message: dict, sid):
+    """Au plus une traduction d'intermédiaire toutes les INTERIM_TRANSLATION_INTERVAL secondes"""
+    global interim_task, interim_translated_at
+    if INTERIM_TRANSLATION_INTERVAL <= 0 or (interim_task is not None and not interim_task.done()):
+        return
+    now = time.monotonic()
+    if now - interim_translated_at < INTERIM_TRANSLATION_INTERVAL:
+        return
+    interim_translated_at = now
+    interim_task = asyncio.create_task(translate_interim(message, sid))
+
+
+async def translate_interim(message: dict, sid):
+    global interim_extra, live_interim
+    # Un final arrivé pendant la traduction rend la phrase caduque
+    sequence = next_message_id
+    extras = await extra_translations(message)
+    if next_message_id != sequence or live_interim is None or not extras:
+        return
+    interim_extra = extras
+    # Rediffuse l'intermédiaire le plus récent (le texte a pu avancer entre-temps) ;
+    # nouveau dict : l'ancien a pu être mis en file ou dans un snapshot
+    live_interim = {
+        **live_interim, "translations": {**live_interim["translations"], **interim_extra}
+    }
+    broadcast_message(live_interim, skip_sid=sid)
 
 
 @sio.event
 async def remote_start_recognition(sid):
     """Commande à distance pour démarrer la reconnaissance"""
+    if RELAY_UPSTREAM:
+        return
     global sid_registry
-    logger.info(f"Commande remote_start_recognition reçue de {sid}")
+    logger.info("Commande remote_start_recognition reçue de %s", sid)
     
     # Mettre à jour l'état
     sid_registry["recognition_state"] = True
     
-    # Envoyer la commande au master
+    # Envoyer la commande au master, avec le token en cache s'il est encore frais
+    # (sinon le master utilise le sien ou en redemande un)
     if sid_registry.get("master"):
-        await sio.emit("start_recognition_command", to=sid_registry["master"])
-        logger.info(f"Commande envoyée au master: {sid_registry['master']}")
+        await outbound.emit_control(
+            "start_recognition_command",
+            speech_token.cached() or {},
+            to=sid_registry["master"],
+        )
+        speech_token.prefetch()
+        logger.info("Commande envoyée au master: %s", sid_registry["master"])
     
     # Synchroniser l'état avec le control
     if sid_registry.get("control"):
-        await sio.emit("recognition_state", True, to=sid_registry["control"])
+        await outbound.emit_control("recognition_state", True, to=sid_registry["control"])
 
 
 @sio.event
 async def remote_stop_recognition(sid):
     """Commande à distance pour arrêter la reconnaissance"""
+    if RELAY_UPSTREAM:
+        return
     global sid_registry
-    logger.info(f"Commande remote_stop_recognition reçue de {sid}")
+    logger.info("Commande remote_stop_recognition reçue de %s", sid)
     
     # Mettre à jour l'état
     sid_registry["recognition_state"] = False
     
     # Envoyer la commande au master
     if sid_registry.get("master"):
-        await sio.emit("stop_recognition_command", to=sid_registry["master"])
-        logger.info(f"Commande envoyée au master: {sid_registry['master']}")
+        await outbound.emit_control("stop_recognition_command", to=sid_registry["master"])
+        logger.info("Commande envoyée au master: %s", sid_registry["master"])
     
     # Synchroniser l'état avec le control
     if sid_registry.get("control"):
-        await sio.emit("recognition_state", False, to=sid_registry["control"])
+        await outbound.emit_control("recognition_state", False, to=sid_registry["control"])
 
 
 @sio.event
 async def update_recognition_state(sid, state):
     """Le master informe le serveur de son état de reconnaissance"""
+    if RELAY_UPSTREAM:
+        return
     global sid_registry
-    logger.info(f"État de reconnaissance mis à jour: {state}")
+    logger.info("État de reconnaissance mis à jour: %s", state)
     
     # Mettre à jour l'état global
     sid_registry["recognition_state"] = state
     
     # Synchroniser avec le control si connecté
     if sid_registry.get("control"):
-        await sio.emit("recognition_state", state, to=sid_registry["control"])
+        await outbound.emit_control("recognition_state", state, to=sid_registry["control"])
+
+
+@sio.event
+async def recognition_latency(sid, data):
+    """Le master rapporte la durée d'un démarrage (commande -> premier intermédiaire)"""
+    if sid != sid_registry.get("master") or not isinstance(data, dict):
+        return
+    start_latencies.record(data)
+    hot_logger.info(
+        "Démarrage de la reconnaissance",
+        extra={"sid": sid, "warm": data.get("warm"), "first_interim_ms": data.get("first_interim_ms")},
+    )
 
 
 # Pour lancer le serveur :
@@ -0,0 +1,131 @@
+"""
+Archivage à froid des anciennes conversations.
+
+Chaque conversation archivée devient un fichier JSONL compressé
+(storage/archive/conversation-<id>.jsonl.gz) :
+    - 1re ligne : {"conversation": {...}}
+    - lignes suivantes : un message par ligne (même format que load_history)
+Ses messages sont ensuite supprimés de la base, la ligne conversation et ses
+agrégats restent pour la liste du master.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+from database import (
+    MESSAGE_PAGE_SIZE,
+    get_conversations_to_archive,
+    incremental_vacuum,
+    iter_messages_by_conversation,
+    mark_conversation_archived,
+    ndjson_page,
+    query_cache,
+)
+
+ARCHIVE_DIR = os.environ.get("ARCHIVE_DIR", "storage/archive")
+RETENTION_DAYS = int(os.environ.get("RETENTION_DAYS", "90"))
+# Messages lus puis écrits (compressés, dans un thread) à la fois
+EXPORT_BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def archive_path_for(conversation_id: int) -> str:
+    return os.path.join(ARCHIVE_DIR, f"conversation-{conversation_id}.jsonl.gz")
+
+
+def _conversation_header(conv) -> dict:
+    return {
+        "conversation": {
+            "id": conv.id,
+            "title": conv.title,
+            "created_at": conv.created_at.isoformat(),
+        }
+    }
+
+
+async def export_conversation(conv) -> str:
+    """
+    Écrit l'archive (fichier temporaire puis renommage atomique) et retourne son chemin.
+    Messages dans l'ordre des ids, comme les pages de la base chaude ; la compression
+    et les écritures se font dans un thread, par lots, hors de la boucle asyncio.
+    """
+    await asyncio.to_thread(os.makedirs, ARCHIVE_DIR, exist_ok=True)
+    path = archive_path_for(conv.id)
+    tmp_path = path + ".tmp"
+    f = await asyncio.to_thread(gzip.open, tmp_path, "wt", encoding="utf-8")
+    try:
+        lines = [json.dumps(_conversation_header(conv), ensure_ascii=False) + "\n"]
+        async for msg in iter_messages_by_conversation(conv.id, EXPORT_BATCH_SIZE):
+            lines.append(json.dumps(msg.to_dict(), ensure_ascii=False) + "\n")
+            if len(lines) >= EXPORT_BATCH_SIZE:
+                await asyncio.to_thread(f.writelines, lines)
+                lines = []
+        await asyncio.to_thread(f.writelines, lines)
+    finally:
+        await asyncio.to_thread(f.close)
+    await asyncio.to_thread(os.replace, tmp_path, path)
+    return path
+
+
+async def archive_old_conversations(
+    older_than_days: int = RETENTION_DAYS,
+) -> tuple[list[int], list[int]]:
+    """
+    Archive les conversations plus anciennes que `older_than_days` jours.
+    Retourne (archivées, introuvables) : une conversation supprimée pendant
+    l'export n'est pas archivée et son fichier est retiré.
+    """
+    cutoff = datetime.now() - timedelta(days=older_than_days)
+    archived, missing = [], []
+    for conv in await get_conversations_to_archive(cutoff):
+        path = await export_conversation(conv)
+        # Suppression seulement une fois l'archive complète sur disque
+        if not await mark_conversation_archived(conv.id, path):
+            await asyncio.to_thread(os.remove, path)
+            missing.append(conv.id)
+            logger.warning("Conversation %s introuvable, archive abandonnée", conv.id)
+            continue
+        archived.append(conv.id)
+        logger.info("Conversation %s archivée dans %s", conv.id, path)
+    if archived:
+        await incremental_vacuum()
+    return archived, missing
+
+
+def iter_archived_messages(path: str):
+    """Relit les messages d'une archive, ligne par ligne"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        next(f, None)  # en-tête conversation
+        for line in f:
+            yield json.loads(line)
+
+
+def _load_archived_pages(conversation_id: int, path: str, limit: int):
+    """Décompresse l'archive une fois et met toutes ses pages en cache"""
+    pages = {}
+    after_id, batch = 0, []
+    for msg in iter_archived_messages(path):
+        batch.append(msg)
+        if len(batch) == limit:
+            pages[after_id] = ndjson_page(batch)
+            after_id, batch = msg["id"], []
+    pages[after_id] = ndjson_page(batch)
+    for page_after_id, page in pages.items():
+        query_cache.put(("messages", conversation_id, page_after_id, limit), page, len(page[0]))
+    return pages
+
+
+async def get_archived_page(
+    conversation_id: int, path: str, after_id: int = 0, limit: int = MESSAGE_PAGE_SIZE
+) -> tuple[bytes, int | None, int]:
+    """Équivalent de database.get_message_page pour une conversation archivée (immuable)"""
+    page = query_cache.get(("messages", conversation_id, after_id, limit))
+    if page is not None:
+        return page
+    pages = await asyncio.to_thread(_load_archived_pages, conversation_id, path, limit)
+    return pages.get(after_id) or ndjson_page([])
@@ -0,0 +1,212 @@
+"""
+Benchmarks de la couche stockage (database.py)
+
+    python benchmarks/bench_database.py --sizes 1000,100000 --out bench.json
+    python benchmarks/bench_database.py --sizes 1000,100000 --compare bench.json
+
+Pour chaque moteur (fichier temporaire, SQLite en mémoire) et chaque taille
+d'archive, la base est peuplée avec populate_db.py puis on mesure :
+    - init_db au démarrage
+    - add_message (un commit par message) et add_messages (par lots)
+    - get_messages_by_conversation et get_conversation_list (p50 / p95, sans le
+      cache de lecture ; get_conversation_list_cached : servie par le cache)
+Les résultats sont écrits en JSON ; --compare signale les régressions
+par rapport à un fichier de référence.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+import populate_db  # noqa: E402
+from metrics import percentile  # noqa: E402
+
+WRITE_COUNT = 200
+BATCH_SIZE = 50
+READ_REPEAT = 30
+# En dessous de cet écart absolu (ms), une différence est considérée comme du bruit
+MIN_DELTA_MS = 1.0
+
+
+async def _timed(func, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    await func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def _message(i: int) -> dict:
+    fr, es = populate_db.PHRASES[i % len(populate_db.PHRASES)]
+    return {
+        "translations": {"fr": fr, "es": es},
+        "source_language": "fr-FR",
+        "timestamp": datetime.now(),
+    }
+
+
+async def _seed(rows: int):
+    args = argparse.Namespace(
+        messages=rows,
+        conversations=max(1, rows // 500),
+        seed=0,
+        days=30,
+        end_date=populate_db.END_DATE,
+        batch_size=50_000,
+        phrase_fragments=(1, 3),
+        fr_ratio=0.7,
+        interims_per_final=0,
+        events_out=None,
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        await populate_db.populate_database(args)
+
+
+async def bench_backend(backend: str, url: str, rows: int) -> list[dict]:
+    database.configure_engine(url)
+    results = []
+
+    def record(metric, value, unit, higher_is_better=False):
+        results.append({
+            "backend": backend,
+            "rows": rows,
+            "metric": metric,
+            "value": value,
+            "unit": unit,
+            "higher_is_better": higher_is_better,
+        })
+
+    try:
+        await _seed(rows)
+
+        # Démarrage : init_db sur une base déjà remplie
+        record("init_db", await _timed(database.init_db) * 1000, "ms")
+
+        conversations = await database.get_conversations()
+        target = max(conversations, key=lambda c: c.message_count)
+
+        # Tour de chauffe : cache de pages SQLite et compilation des requêtes
+        await database.get_messages_by_conversation(target.id)
+        await database.get_conversation_list()
+
+        reads = [await _timed(database.get_messages_by_conversation, target.id) for _ in range(READ_REPEAT)]
+        record("get_messages_by_conversation_p50", percentile(reads, 0.5) * 1000, "ms")
+        record("get_messages_by_conversation_p95", percentile(reads, 0.95) * 1000, "ms")
+
+        # Requête elle-même : cache de lecture vidé avant chaque appel
+        lists = []
+        for _ in range(READ_REPEAT):
+            database.query_cache.clear()
+            lists.append(await _timed(database.get_conversation_list))
+        record("get_conversation_list_p50", percentile(lists, 0.5) * 1000, "ms")
+        record("get_conversation_list_p95", percentile(lists, 0.95) * 1000, "ms")
+
+        # Servie par le cache de lecture (rempli par l'appel précédent)
+        cached = [await _timed(database.get_conversation_list) for _ in range(READ_REPEAT)]
+        record("get_conversation_list_cached_p50", percentile(cached, 0.5) * 1000, "ms")
+
+        conv = await database.create_conversation("benchmark")
+        start = time.perf_counter()
+        for i in range(WRITE_COUNT):
+            data = _message(i)
+            await database.add_message(conv.id, **data)
+        record("add_message_single", WRITE_COUNT / (time.perf_counter() - start), "msg/s", True)
+
+        start = time.perf_counter()
+        for i in range(0, WRITE_COUNT, BATCH_SIZE):
+            await database.add_messages(conv.id, [_message(j) for j in range(i, i + BATCH_SIZE)])
+        record("add_message_batched", WRITE_COUNT / (time.perf_counter() - start), "msg/s", True)
+    finally:
+        await database.dispose_engine()
+    return results
+
+
+async def run(sizes: list[int], backends: list[str]) -> dict:
+    results = []
+    for rows in sizes:
+        for backend in backends:
+            with tempfile.TemporaryDirectory() as tmp:
+                url = (
+                    "sqlite+aiosqlite://"
+                    if backend == "memory"
+                    else f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+                )
+                print(f"→ {backend}, {rows} messages...", file=sys.stderr)
+                results.extend(await bench_backend(backend, url, rows))
+    return {
+        "meta": {
+            "date": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "backends": backends,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Régressions de plus de `threshold` (relatif) par rapport à la référence"""
+    key = lambda r: (r["backend"], r["rows"], r["metric"])  # noqa: E731
+    reference = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        ref = reference.get(key(result))
+        if not ref or not ref["value"]:
+            continue
+        if result["unit"] == "ms" and abs(result["value"] - ref["value"]) < MIN_DELTA_MS:
+            continue
+        change = (result["value"] - ref["value"]) / ref["value"]
+        if result["higher_is_better"]:
+            change = -change
+        if change > threshold:
+            regressions.append(
+                f"{result['backend']}/{result['rows']}/{result['metric']}: "
+                f"{ref['value']:.2f} -> {result['value']:.2f} {result['unit']} ({change:+.0%})"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de database.py")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000",
+                        help="tailles d'archive (nombre de messages), séparées par des virgules")
+    parser.add_argument("--backends", default="file,memory", help="file, memory ou les deux")
+    parser.add_argument("--out", help="fichier JSON des résultats (sinon sortie standard)")
+    parser.add_argument("--compare", metavar="BASELINE", help="fichier JSON de référence")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="écart relatif toléré avant de signaler une régression")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    backends = [backend.strip() for backend in args.backends.split(",")]
+    report = asyncio.run(run(sizes, backends))
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"RÉGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("✓ Aucune régression", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Benchmark du démarrage de l'application (pm2 reload)
+
+    python benchmarks/bench_startup.py --sizes 0,100000 --out startup.json
+    python benchmarks/bench_startup.py --sizes 0,100000 --compare startup.json
+
+Pour chaque taille de base (peuplée avec populate_db.py) et chaque scénario :
+    - cold : démarrage sans snapshot (lecture de la base)
+    - snapshot : redémarrage après un arrêt propre (état live relu depuis CHECKPOINT_FILE)
+un processus uvicorn est lancé plusieurs fois et on mesure (p50) :
+    - import_app : import du module app seul
+    - time_to_listen : lancement -> port TCP ouvert
+    - time_to_first_response : lancement -> première réponse de /healthz
+    - time_to_history : lancement -> historique reçu par un client Socket.IO
+Même format JSON (champ "backend" = scénario) et même mode --compare que bench_database.py.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+import socketio
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import database  # noqa: E402
+from bench_database import MIN_DELTA_MS, _seed, compare  # noqa: E402
+from metrics import percentile  # noqa: E402
+
+SCENARIOS = ("cold", "snapshot")
+STARTUP_TIMEOUT = 30
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _import_time(env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import app"], cwd=ROOT, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+async def _wait_for(check, deadline: float):
+    while time.perf_counter() < deadline:
+        try:
+            if await check():
+                return time.perf_counter()
+        except (OSError, httpx.HTTPError, socketio.exceptions.ConnectionError):
+            pass
+        await asyncio.sleep(0.005)
+    raise TimeoutError("le serveur n'a pas démarré à temps")
+
+
+async def start_once(env: dict) -> dict[str, float]:
+    """Lance le serveur, mesure les trois étapes, puis l'arrête proprement (SIGINT)"""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:socket_app", "--port", str(port)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = start + STARTUP_TIMEOUT
+    try:
+        async def port_open():
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return True
+
+        listen = await _wait_for(port_open, deadline)
+
+        async with httpx.AsyncClient(base_url=url) as http:
+            async def healthz():
+                return (await http.get("/healthz")).status_code == 200
+
+            first_response = await _wait_for(healthz, deadline)
+
+        history = asyncio.get_running_loop().create_future()
+        client = socketio.AsyncClient(reconnection=False)
+        client.on("load_history", lambda data: history.done() or history.set_result(time.perf_counter()))
+        await client.connect(url, headers={"Referer": f"{url}/viewer"})
+        await client.emit("subscribe", {"languages": []})
+        history_at = await asyncio.wait_for(history, STARTUP_TIMEOUT)
+        await client.disconnect()
+    finally:
+        process.send_signal(signal.SIGINT)
+        process.wait(timeout=STARTUP_TIMEOUT)
+
+    return {
+        "time_to_listen": (listen - start) * 1000,
+        "time_to_first_response": (first_response - start) * 1000,
+        "time_to_history": (history_at - start) * 1000,
+    }
+
+
+async def bench_size(rows: int, runs: int) -> list[dict]:
+    results = []
+
+    def record(scenario, metric, samples):
+        results.append({
+            "backend": scenario,
+            "rows": rows,
+            "metric": metric,
+            "value": percentile(samples, 0.5),
+            "unit": "ms",
+            "higher_is_better": False,
+        })
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        database.configure_engine(url)
+        try:
+            await database.init_db()
+            if rows:
+                await _seed(rows)
+        finally:
+            await database.dispose_engine()
+
+        checkpoint = os.path.join(tmp, "live_state.json")
+        env = {
+            **os.environ,
+            "DATABASE_URL": url,
+            "CHECKPOINT_FILE": checkpoint,
+            "LOG_SAMPLE_RATE": "0",
+            "RATE_LIMIT_CONNECT": "1000/60",
+        }
+        imports = [_import_time(env) * 1000 for _ in range(runs)]
+        record("cold", "import_app", imports)
+
+        for scenario in SCENARIOS:
+            samples: dict[str, list[float]] = {}
+            for _ in range(runs):
+                if scenario == "cold" and os.path.exists(checkpoint):
+                    os.remove(checkpoint)
+                elif scenario == "snapshot" and not os.path.exists(checkpoint):
+                    await start_once(env)  # arrêt propre : écrit le snapshot
+                for metric, value in (await start_once(env)).items():
+                    samples.setdefault(metric, []).append(value)
+            for metric, values in samples.items():
+                record(scenario, metric, values)
+    return results
+
+
+async def run(sizes: list[int], runs: int) -> dict:
+    results = []
+    for rows in sizes:
+        print(f"→ {rows} messages...", file=sys.stderr)
+        results.extend(await bench_size(rows, runs))
+    return {
+        "meta": {
+            "date": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "runs": runs,
+            "min_delta_ms": MIN_DELTA_MS,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du démarrage de app.py")
+    parser.add_argument("--sizes", default="0,10000,100000",
+                        help="tailles de base (nombre de messages), séparées par des virgules")
+    parser.add_argument("--runs", type=int, default=5, help="démarrages par scénario")
+    parser.add_argument("--out", help="fichier JSON des résultats (sinon sortie standard)")
+    parser.add_argument("--compare", metavar="BASELINE", help="fichier JSON de référence")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="écart relatif toléré avant de signaler une régression")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    report = asyncio.run(run(sizes, args.runs))
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"RÉGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("✓ Aucune régression", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
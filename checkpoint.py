@@ -0,0 +1,87 @@
+"""
+Sauvegarde de l'état live à l'arrêt du serveur et restauration au redémarrage
+(pm2 reload à chaque déploiement), pour éviter de relire la conversation en base.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import signal
+import threading
+import time
+
+CHECKPOINT_FILE = os.environ.get("CHECKPOINT_FILE", "storage/live_state.json")
+# Au-delà, le snapshot est jugé trop vieux (crash, arrêt prolongé) : on relit la base
+CHECKPOINT_MAX_AGE = int(os.environ.get("CHECKPOINT_MAX_AGE", "600"))
+CHECKPOINT_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+def save_snapshot(state: dict, path: str = CHECKPOINT_FILE):
+    """Écriture atomique (fichier temporaire puis renommage) d'un JSON compact"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"version": CHECKPOINT_VERSION, "saved_at": time.time(), **state},
+            f,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path: str = CHECKPOINT_FILE) -> dict | None:
+    """Snapshot utilisable, ou None (absent, illisible, autre version, trop ancien)"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning("Snapshot illisible (%s): %s", path, e)
+        return None
+    if snapshot.get("version") != CHECKPOINT_VERSION:
+        return None
+    if time.time() - snapshot.get("saved_at", 0) > CHECKPOINT_MAX_AGE:
+        logger.info("Snapshot trop ancien, ignoré")
+        return None
+    return snapshot
+
+
+def install_drain_handlers(drain, grace: float = 1.0):
+    """
+    Intercale `drain()` avant l'arrêt géré par uvicorn (SIGINT/SIGTERM envoyés par pm2) :
+    les clients sont prévenus tant que leurs connexions sont encore ouvertes.
+    À appeler depuis la boucle asyncio (lifespan), après l'installation des handlers d'uvicorn.
+    Hors du thread principal (TestClient, uvicorn embarqué) les signaux ne peuvent pas
+    être interceptés : pas de drain, le snapshot est tout de même écrit à l'arrêt.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        logger.info("Hors du thread principal : arrêt sans drain des connexions")
+        return
+    loop = asyncio.get_running_loop()
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(sig)
+        if not callable(previous):
+            continue
+
+        def handler(signum, frame, previous=previous):
+            # Deuxième signal pendant le drain : arrêt immédiat
+            signal.signal(signum, previous)
+
+            async def drain_then_exit():
+                try:
+                    await asyncio.wait_for(drain(), grace)
+                    await asyncio.sleep(grace)
+                except Exception as e:
+                    logger.warning("Drain des connexions incomplet: %s", e)
+                finally:
+                    previous(signum, frame)
+
+            loop.call_soon_threadsafe(loop.create_task, drain_then_exit())
+
+        signal.signal(sig, handler)
@@ -1,45 +1,300 @@
-from models import Conversation, Message
-from sqlmodel import SQLModel, select
+from models import Conversation, Message, Translation
+from sqlmodel import SQLModel, select, delete, col
+from sqlalchemy import case, func, insert, inspect, text, update
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from sqlmodel.ext.asyncio.session import AsyncSession
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
+import asyncio
+import json
 import logging
 import os
 
 DEV_MODE = os.environ.get("DEV_MODE", "False") == "True"
 
+# Les handlers sont installés par log_config.setup_logging (file + thread d'écriture)
 logger = logging.getLogger(__name__)
 if DEV_MODE:
     logger.setLevel(logging.DEBUG)
 else:
     logger.setLevel(logging.INFO)
-logger.addHandler(logging.StreamHandler())
 
 # 1. Configuration
 # Note: On garde create_async_engine de SQLAlchemy car SQLModel ne l'expose pas encore
-DATABASE_URL = "sqlite+aiosqlite:///./database.db"
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite+aiosqlite:///./database.db")
 
-engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+
+def configure_engine(url: str = DATABASE_URL):
+    """(Re)crée le moteur et la fabrique de session, ex: base temporaire ou en mémoire"""
+    global engine, async_session_factory
+    kwargs = {}
+    if url.endswith(":memory:") or url.endswith("://"):
+        # SQLite en mémoire : une seule connexion partagée, sinon chaque connexion a sa base
+        kwargs["poolclass"] = StaticPool
+    engine = create_async_engine(url, echo=False, future=True, **kwargs)
+    # On configure le factory pour qu'il produise des sessions SQLModel
+    async_session_factory = sessionmaker(
+        bind=engine,
+        class_=AsyncSession,  # On utilise la session SQLModel importée plus haut
+        expire_on_commit=False,
+    )
+    return engine
+
+
+configure_engine()
+
+
+async def dispose_engine():
+    """
+    Ferme les connexions du moteur courant. Les autres modules passent par
+    ici (ou par database.engine) : un `from database import engine` garderait
+    le moteur d'avant un configure_engine.
+    """
+    await engine.dispose()
+
+
+# --- CACHE DE LECTURE ---
+# LRU borné en octets devant les lectures répétées (liste des conversations,
+# conversation, pages de messages). Invalidé par les écritures qui les concernent.
+CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+MESSAGE_PAGE_SIZE = 500
+
+
+class ByteLRUCache:
+    """
+    Cache LRU borné en octets. Les clés de la forme (type, conversation_id, ...) sont
+    indexées par conversation : les invalider ne parcourt que les entrées de celle-ci.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[tuple, tuple[object, int]] = OrderedDict()
+        self._by_conversation: dict[int, set[tuple]] = {}
+
+    def get(self, key: tuple):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: tuple, value, size: int):
+        if size > self.max_bytes:
+            return
+        self.discard(key)
+        self._entries[key] = (value, size)
+        self.bytes += size
+        if len(key) > 1:
+            self._by_conversation.setdefault(key[1], set()).add(key)
+        while self.bytes > self.max_bytes:
+            evicted_key, (_, evicted) = self._entries.popitem(last=False)
+            self._unindex(evicted_key)
+            self.bytes -= evicted
+            self.evictions += 1
+
+    def _unindex(self, key: tuple):
+        if len(key) > 1:
+            keys = self._by_conversation.get(key[1])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_conversation[key[1]]
+
+    def discard(self, key: tuple):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._unindex(key)
+            self.bytes -= entry[1]
+
+    def invalidate_conversation(self, conversation_id: int):
+        """Entrées d'une conversation (clés de la forme (type, conversation_id, ...))"""
+        for key in self._by_conversation.pop(conversation_id, ()):
+            self.bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        self._entries.clear()
+        self._by_conversation.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0,
+            "evictions": self.evictions,
+        }
+
+
+query_cache = ByteLRUCache(CACHE_MAX_BYTES)
+
+
+def _invalidate_conversation(conversation_id: int):
+    query_cache.discard(("conversation_list",))
+    query_cache.invalidate_conversation(conversation_id)
+
+
+# --- SANTÉ DES ÉCRITURES ---
+
+
+class WriteHealth:
+    """Dernier succès / dernière erreur des écritures en base (pour /readyz)"""
+
+    def __init__(self):
+        self.last_success = None
+        self.last_error = None
+        self.last_error_message = None
+        self.consecutive_errors = 0
+        self.last_probe = None
+
+    @contextmanager
+    def track(self):
+        try:
+            yield
+        except Exception as e:
+            self.last_error = datetime.now()
+            self.last_error_message = str(e)
+            self.consecutive_errors += 1
+            raise
+        self.last_success = datetime.now()
+        self.consecutive_errors = 0
+
+    @property
+    def healthy(self) -> bool:
+        return self.consecutive_errors == 0
+
+    async def probe(self, timeout: float = 2.0) -> bool:
+        """
+        Après une erreur d'écriture, vérifie activement la base (SELECT 1) : sans
+        nouvelle écriture, une erreur passagère laisserait /readyz à 503 indéfiniment.
+        """
+        if self.healthy:
+            return True
+        self.last_probe = datetime.now()
+        try:
+            async with asyncio.timeout(timeout):
+                async with engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+        except Exception as e:
+            self.last_error_message = f"probe: {e or type(e).__name__}"
+            return False
+        self.consecutive_errors = 0
+        return True
+
+    def to_dict(self) -> dict:
+        return {
+            "healthy": self.healthy,
+            "last_success": self.last_success.isoformat() if self.last_success else None,
+            "last_error": self.last_error.isoformat() if self.last_error else None,
+            "last_error_message": self.last_error_message,
+            "consecutive_errors": self.consecutive_errors,
+            "last_probe": self.last_probe.isoformat() if self.last_probe else None,
+        }
+
+
+write_health = WriteHealth()
+
+
+def ndjson_page(messages: list[dict]) -> tuple[bytes, int | None, int]:
+    """Page de messages sérialisée une fois : (corps NDJSON, dernier id, nombre)"""
+    body = "".join(json.dumps(m, ensure_ascii=False) + "\n" for m in messages).encode()
+    last_id = messages[-1]["id"] if messages else None
+    return body, last_id, len(messages)
 
 
 # 2. Initialisation (Création des tables)
+# Version du schéma, stockée dans PRAGMA user_version : à incrémenter à chaque
+# changement de modèle (nouvelle colonne, nouvelle table...)
+SCHEMA_VERSION = 1
+
+
 async def init_db():
+    query_cache.clear()
     async with engine.begin() as conn:
+        # Démarrage rapide : base déjà à jour, pas d'inspection ni de create_all
+        version = (await conn.exec_driver_sql("PRAGMA user_version")).scalar()
+        if version == SCHEMA_VERSION:
+            return
+        # Ancien schéma : colonnes "fr" / "es" directement dans la table message
+        legacy = await conn.run_sync(_has_legacy_message_table)
+        if legacy:
+            await conn.exec_driver_sql("ALTER TABLE message RENAME TO message_legacy")
         # Ici on utilise bien SQLModel pour créer la structure
         await conn.run_sync(SQLModel.metadata.create_all)
+        if legacy:
+            await _migrate_legacy_messages(conn)
+        added = await conn.run_sync(_add_conversation_columns)
+    if "message_count" in added:
+        # Colonnes d'agrégats créées sur une base existante : on les remplit
+        await rebuild_conversation_stats()
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+LEGACY_LANGUAGES = ("fr", "es")
 
 
-# 3. La Fabrique de Session (Le "Factory")
-# On configure le factory pour qu'il produise des sessions SQLModel
-async_session_factory = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,  # On utilise la session SQLModel importée plus haut
-    expire_on_commit=False,
-)
+def _has_legacy_message_table(sync_conn) -> bool:
+    inspector = inspect(sync_conn)
+    if not inspector.has_table("message"):
+        return False
+    columns = {col["name"] for col in inspector.get_columns("message")}
+    return set(LEGACY_LANGUAGES) <= columns
 
 
-# 4. Fonction utilitaire pour récupérer une session
+# Colonnes ajoutées à une table conversation existante (create_all ne fait pas d'ALTER).
+# Toute nouvelle entrée doit s'accompagner d'une incrémentation de SCHEMA_VERSION.
+CONVERSATION_ADDED_COLUMNS = {
+    "message_count": "INTEGER NOT NULL DEFAULT 0",
+    "word_count": "INTEGER NOT NULL DEFAULT 0",
+    "first_message_at": "DATETIME",
+    "last_message_at": "DATETIME",
+    "language_counts": "JSON",
+    "archived_at": "DATETIME",
+    "archive_path": "VARCHAR",
+}
+
+
+def _add_conversation_columns(sync_conn) -> list[str]:
+    existing = {c["name"] for c in inspect(sync_conn).get_columns("conversation")}
+    added = [name for name in CONVERSATION_ADDED_COLUMNS if name not in existing]
+    for name in added:
+        sync_conn.exec_driver_sql(
+            f"ALTER TABLE conversation ADD COLUMN {name} {CONVERSATION_ADDED_COLUMNS[name]}"
+        )
+    return added
+
+
+async def _migrate_legacy_messages(conn):
+    """Copie les lignes à deux colonnes vers message + translation (même transaction)"""
+    await conn.exec_driver_sql(
+        "INSERT INTO message (id, conversation_id, timestamp, source_language) "
+        "SELECT id, conversation_id, timestamp, source_language FROM message_legacy"
+    )
+    for lang in LEGACY_LANGUAGES:
+        await conn.exec_driver_sql(
+            f"INSERT INTO translation (message_id, lang, text) "
+            f"SELECT id, '{lang}', {lang} FROM message_legacy"
+        )
+    result = await conn.exec_driver_sql("SELECT COUNT(*) FROM message_legacy")
+    count = result.scalar()
+    await conn.exec_driver_sql("DROP TABLE message_legacy")
+    logger.info("Migration du schéma des messages: %d messages convertis", count)
+
+
+# 3. Fonction utilitaire pour récupérer une session
 # À utiliser dans main.py ou crud.py
 async def get_session():
     async with async_session_factory() as session:
@@ -50,29 +305,182 @@ async def get_session():
 
 
 async def create_conversation(title: str):
-    async with async_session_factory() as session:
-        conv = Conversation(title=title)
-        session.add(conv)
-        await session.commit()
-        await session.refresh(conv),
-        return conv
+    with write_health.track():
+        async with async_session_factory() as session:
+            conv = Conversation(title=title)
+            session.add(conv)
+            await session.commit()
+            await session.refresh(conv),
+    query_cache.discard(("conversation_list",))
+    return conv
 
 
-async def add_message(
-    conversation_id: int, fr: str, es: str, source_language: str, timestamp: datetime
+def source_text(translations: dict[str, str], source_language: str) -> str:
+    """Texte dans la langue parlée ("fr-FR" -> traduction "fr"), sinon la première"""
+    base = source_language.lower().split("-")[0]
+    for lang, text in translations.items():
+        if lang.lower().split("-")[0] == base:
+            return text
+    return next(iter(translations.values()), "")
+
+
+def count_words(text: str) -> int:
+    return len(text.split())
+
+
+def local_naive(timestamp: datetime) -> datetime:
+    """
+    SQLite stocke les dates sans fuseau, en heure locale (datetime.now) :
+    une date avec fuseau (ex: "Z" envoyé par le master) est convertie avant
+    """
+    if timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone().replace(tzinfo=None)
+
+
+def _apply_message_stats(
+    conv: Conversation, words: int, source_language: str, timestamp: datetime
 ):
-    async with async_session_factory() as session:
-        msg = Message(
-            conversation_id=conversation_id,
-            fr=fr,
-            es=es,
-            source_language=source_language,
-            timestamp=timestamp,
+    timestamp = local_naive(timestamp)
+    conv.message_count += 1
+    conv.word_count += words
+    if conv.first_message_at is None or timestamp < conv.first_message_at:
+        conv.first_message_at = timestamp
+    if conv.last_message_at is None or timestamp > conv.last_message_at:
+        conv.last_message_at = timestamp
+    # Nouveau dict pour que SQLAlchemy détecte la modification de la colonne JSON
+    counts = dict(conv.language_counts or {})
+    counts[source_language] = counts.get(source_language, 0) + 1
+    conv.language_counts = counts
+
+
+def _stats_update(conversation_id: int, messages: list[tuple[int, str, datetime]]):
+    """
+    UPDATE des agrégats pour des messages (mots, langue source, date) : calculé
+    par SQLite à partir des valeurs en base, sans lecture préalable. Deux finals
+    enregistrés en même temps ne peuvent pas s'écraser mutuellement.
+    """
+    first = min(timestamp for _, _, timestamp in messages)
+    last = max(timestamp for _, _, timestamp in messages)
+    languages: dict[str, int] = {}
+    for _, language, _ in messages:
+        languages[language] = languages.get(language, 0) + 1
+
+    counts = func.coalesce(Conversation.language_counts, "{}")
+    json_args = []
+    for language, count in languages.items():
+        path = "$." + json.dumps(language)
+        json_args += [path, func.coalesce(func.json_extract(counts, path), 0) + count]
+
+    return (
+        update(Conversation)
+        .where(Conversation.id == conversation_id)
+        .values(
+            message_count=Conversation.message_count + len(messages),
+            word_count=Conversation.word_count + sum(words for words, _, _ in messages),
+            first_message_at=case(
+                (
+                    Conversation.first_message_at.is_(None) | (Conversation.first_message_at > first),
+                    first,
+                ),
+                else_=Conversation.first_message_at,
+            ),
+            last_message_at=case(
+                (
+                    Conversation.last_message_at.is_(None) | (Conversation.last_message_at < last),
+                    last,
+                ),
+                else_=Conversation.last_message_at,
+            ),
+            language_counts=func.json_set(counts, *json_args),
         )
-        session.add(msg)
-        await session.commit()
-        await session.refresh(msg)
-        logger.debug(f"Message sauvegardé: {msg.id}")
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def add_message(
+    conversation_id: int,
+    translations: dict[str, str],
+    source_language: str,
+    timestamp: datetime,
+    message_id: int | None = None,
+):
+    timestamp = local_naive(timestamp)
+    with write_health.track():
+        async with async_session_factory() as session:
+            msg = Message(
+                id=message_id,
+                conversation_id=conversation_id,
+                source_language=source_language,
+                timestamp=timestamp,
+                translations=[
+                    Translation(lang=lang, text=text)
+                    for lang, text in translations.items()
+                    if text
+                ],
+            )
+            session.add(msg)
+            # Agrégats mis à jour dans la même transaction que le message
+            words = count_words(source_text(translations, source_language))
+            await session.exec(
+                _stats_update(conversation_id, [(words, source_language, timestamp)])
+            )
+            await session.commit()
+    _invalidate_conversation(conversation_id)
+    logger.debug("Message sauvegardé: %s", msg.id)
+    return msg
+
+
+async def add_translations(conversation_id: int, message_id: int, translations: dict[str, str]):
+    """Ajoute à un message déjà sauvegardé des langues traduites après coup (EXTRA_LANGUAGES)"""
+    rows = [
+        {"message_id": message_id, "lang": lang, "text": text}
+        for lang, text in translations.items()
+        if text
+    ]
+    if not rows:
+        return
+    with write_health.track():
+        async with async_session_factory() as session:
+            await session.execute(insert(Translation.__table__), rows)
+            await session.commit()
+    _invalidate_conversation(conversation_id)
+
+
+async def add_messages(conversation_id: int, messages: list[dict]):
+    """
+    Variante groupée d'add_message : une seule transaction pour plusieurs messages.
+    Chaque message : {"translations", "source_language", "timestamp"}
+    """
+    if not messages:
+        return []
+    with write_health.track():
+        async with async_session_factory() as session:
+            msgs = []
+            stats = []
+            for data in messages:
+                timestamp = local_naive(data["timestamp"])
+                msg = Message(
+                    conversation_id=conversation_id,
+                    source_language=data["source_language"],
+                    timestamp=timestamp,
+                    translations=[
+                        Translation(lang=lang, text=text)
+                        for lang, text in data["translations"].items()
+                        if text
+                    ],
+                )
+                session.add(msg)
+                msgs.append(msg)
+                stats.append((
+                    count_words(source_text(data["translations"], data["source_language"])),
+                    data["source_language"],
+                    timestamp,
+                ))
+            await session.exec(_stats_update(conversation_id, stats))
+            await session.commit()
+    _invalidate_conversation(conversation_id)
+    return msgs
 
 
 async def get_conversations():
@@ -82,23 +490,87 @@ async def get_conversations():
         return result.all()
     
 async def get_conversation_by_id(conversation_id: int):
+    key = ("conversation", conversation_id)
+    conv = query_cache.get(key)
+    if conv is not None:
+        return conv
     async with async_session_factory() as session:
         statement = select(Conversation).where(Conversation.id == conversation_id)
         result = await session.exec(statement)
-        return result.one_or_none()
+        conv = result.one_or_none()
+    # Seules les conversations archivées sont figées ; les autres peuvent être
+    # archivées par un autre processus (manage.py archive)
+    if conv is not None and conv.archive_path:
+        query_cache.put(key, conv, len(conv.model_dump_json()))
+    return conv
     
 async def get_last_conversation():
     async with async_session_factory() as session:
-        statement = select(Conversation).order_by(Conversation.created_at.desc())
+        statement = select(Conversation).order_by(Conversation.created_at.desc()).limit(1)
         result = await session.exec(statement)
         return result.first()
 
 async def get_conversation_list():
+    key = ("conversation_list",)
+    # Gardée en JSON : chaque appelant reçoit sa propre copie, modifiable
+    cached = query_cache.get(key)
+    if cached is not None:
+        return json.loads(cached)
     convs = await get_conversations()
-    return [
-        {"id": conv.id, "title": conv.title}
+    conv_list = [
+        {
+            "id": conv.id,
+            "title": conv.title,
+            "created_at": conv.created_at.isoformat(),
+            "message_count": conv.message_count,
+            "word_count": conv.word_count,
+            "duration_seconds": conv.duration_seconds,
+            "language_counts": conv.language_counts or {},
+        }
         for conv in sorted(convs, key=lambda x: x.created_at, reverse=True)
     ]
+    encoded = json.dumps(conv_list)
+    query_cache.put(key, encoded, len(encoded))
+    return conv_list
+
+
+async def rebuild_conversation_stats():
+    """
+    Recalcule les agrégats de toutes les conversations depuis les messages.
+    Lecture en flux (yield_per) : la mémoire reste bornée quelle que soit la taille.
+    """
+    async with async_session_factory() as session:
+        # Les conversations archivées n'ont plus leurs messages : on garde leurs agrégats
+        statement = select(Conversation).where(col(Conversation.archived_at).is_(None))
+        convs = {conv.id: conv for conv in (await session.exec(statement)).all()}
+        for conv in convs.values():
+            conv.message_count = 0
+            conv.word_count = 0
+            conv.first_message_at = None
+            conv.last_message_at = None
+            conv.language_counts = {}
+
+        statement = (
+            select(Message)
+            .order_by(Message.conversation_id, Message.id)
+            .execution_options(yield_per=5000)
+        )
+        result = await session.stream_scalars(statement)
+        async for msg in result:
+            conv = convs.get(msg.conversation_id)
+            if conv is None:
+                continue
+            translations = {t.lang: t.text for t in msg.translations}
+            _apply_message_stats(
+                conv,
+                count_words(source_text(translations, msg.source_language)),
+                msg.source_language,
+                msg.timestamp,
+            )
+        await session.commit()
+        query_cache.clear()
+        logger.info("Statistiques recalculées pour %d conversations", len(convs))
+        return len(convs)
 
 
 async def get_messages_by_conversation(conversation_id: int):
@@ -110,3 +582,145 @@ async def get_messages_by_conversation(conversation_id: int):
         )
         result = await session.exec(statement)
         return result.all()
+
+
+async def get_message_page(
+    conversation_id: int, after_id: int = 0, limit: int = MESSAGE_PAGE_SIZE
+) -> tuple[bytes, int | None, int]:
+    """Messages d'id > after_id (pagination par clé), voir ndjson_page"""
+    key = ("messages", conversation_id, after_id, limit)
+    page = query_cache.get(key)
+    if page is not None:
+        return page
+    async with async_session_factory() as session:
+        statement = (
+            select(Message)
+            .where(Message.conversation_id == conversation_id)
+            .where(Message.id > after_id)
+            .order_by(Message.id)
+            .limit(limit)
+        )
+        result = await session.exec(statement)
+        page = ndjson_page([msg.to_dict() for msg in result.all()])
+    query_cache.put(key, page, len(page[0]))
+    return page
+
+
+async def get_last_messages(conversation_id: int, limit: int):
+    """Les `limit` derniers messages d'une conversation, dans l'ordre chronologique"""
+    async with async_session_factory() as session:
+        statement = (
+            select(Message)
+            .where(Message.conversation_id == conversation_id)
+            .order_by(Message.id.desc())
+            .limit(limit)
+        )
+        result = await session.exec(statement)
+        return list(reversed(result.all()))
+
+
+async def get_last_message_id(conversation_id: int) -> int | None:
+    async with async_session_factory() as session:
+        statement = select(func.max(Message.id)).where(
+            Message.conversation_id == conversation_id
+        )
+        return (await session.exec(statement)).one()
+
+
+async def iter_messages_by_conversation(conversation_id: int, batch_size: int = 1000):
+    """
+    Messages d'une conversation en flux, sans tout charger en mémoire, dans l'ordre
+    des ids (celui de get_message_page)
+    """
+    async with async_session_factory() as session:
+        statement = (
+            select(Message)
+            .where(Message.conversation_id == conversation_id)
+            .order_by(Message.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await session.stream_scalars(statement)
+        async for msg in result:
+            yield msg
+
+
+# --- INSERTION EN MASSE (peuplement, benchmarks) ---
+
+
+async def get_max_ids() -> tuple[int, int]:
+    """Plus grands id de conversation et de message (0 si tables vides)"""
+    async with async_session_factory() as session:
+        max_conv = (await session.exec(select(func.max(Conversation.id)))).one()
+        max_msg = (await session.exec(select(func.max(Message.id)))).one()
+        return max_conv or 0, max_msg or 0
+
+
+async def bulk_insert(
+    conversations: list[dict], messages: list[dict], translations: list[dict]
+):
+    """
+    Insère des lignes déjà construites (id explicites) en une seule transaction,
+    via executemany : sans ORM ni commit par ligne.
+    """
+    async with engine.begin() as conn:
+        for model, rows in (
+            (Conversation, conversations),
+            (Message, messages),
+            (Translation, translations),
+        ):
+            if rows:
+                await conn.execute(insert(model.__table__), rows)
+    query_cache.clear()
+
+
+# --- RÉTENTION / ARCHIVAGE ---
+
+
+async def get_conversations_to_archive(cutoff: datetime):
+    """Conversations non archivées créées avant `cutoff`, hors conversation en cours"""
+    last_conv = await get_last_conversation()
+    async with async_session_factory() as session:
+        statement = (
+            select(Conversation)
+            .where(col(Conversation.archived_at).is_(None))
+            .where(Conversation.created_at < cutoff)
+            .order_by(Conversation.created_at)
+        )
+        if last_conv is not None:
+            statement = statement.where(Conversation.id != last_conv.id)
+        result = await session.exec(statement)
+        return result.all()
+
+
+async def mark_conversation_archived(conversation_id: int, archive_path: str) -> bool:
+    """
+    Supprime les messages de la base chaude (les agrégats restent sur la conversation).
+    Retourne False, sans rien supprimer, si la conversation n'existe pas.
+    """
+    async with async_session_factory() as session:
+        conv = await session.get(Conversation, conversation_id)
+        if conv is None:
+            return False
+        message_ids = select(Message.id).where(Message.conversation_id == conversation_id)
+        await session.exec(delete(Translation).where(col(Translation.message_id).in_(message_ids)))
+        await session.exec(delete(Message).where(Message.conversation_id == conversation_id))
+        conv.archived_at = datetime.now()
+        conv.archive_path = archive_path
+        await session.commit()
+    _invalidate_conversation(conversation_id)
+    return True
+
+
+async def incremental_vacuum():
+    """
+    Rend au système les pages libérées par les suppressions.
+    Le premier appel passe la base en auto_vacuum=INCREMENTAL (VACUUM complet unique).
+    """
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        mode = (await conn.exec_driver_sql("PRAGMA auto_vacuum")).scalar()
+        if mode != 2:
+            await conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+            await conn.exec_driver_sql("VACUUM")
+            logger.info("Base passée en auto_vacuum incrémental")
+        await conn.exec_driver_sql("PRAGMA incremental_vacuum")
@@ -0,0 +1,128 @@
+"""
+Logging non bloquant : les appels de log ne font que déposer l'enregistrement dans
+une file ; le formatage JSON et l'écriture sur stdout (pm2) se font dans un thread.
+
+    from log_config import setup_logging, hot_logger
+    setup_logging()
+    logger.info("Client connecté", extra={"sid": sid})
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+DEV_MODE = os.environ.get("DEV_MODE", "False") == "True"
+# Proportion des logs du chemin critique (hot_logger) réellement émis
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "1" if DEV_MODE else "0.01"))
+
+# Enregistrements en attente d'écriture au-delà desquels les nouveaux sont abandonnés
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+
+# Attributs standard d'un LogRecord : tout le reste vient de `extra=` et part dans le JSON
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler sans le formatage complet côté appelant (prepare() par défaut applique
+    le formateur dans le thread de la boucle asyncio) : seuls le message (msg % args,
+    avant que des arguments mutables ne changent) et la trace d'exception sont figés ici,
+    la sérialisation JSON se fait dans le thread d'écriture.
+    File pleine (stdout bloqué) : l'enregistrement est abandonné et compté.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SampleFilter(logging.Filter):
+    """Ne laisse passer qu'une fraction des enregistrements (les warnings passent toujours)"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+# Logs verbeux du chemin critique (messages socket), échantillonnés
+hot_logger = logging.getLogger("hotpath")
+hot_logger.addFilter(SampleFilter(LOG_SAMPLE_RATE))
+
+_listener: logging.handlers.QueueListener | None = None
+_queue_handler: LazyQueueHandler | None = None
+
+
+def log_stats() -> dict:
+    """Taille de la file de logs et enregistrements abandonnés faute de place"""
+    if _queue_handler is None:
+        return {"queued": 0, "dropped": 0}
+    return {"queued": _queue_handler.queue.qsize(), "dropped": _queue_handler.dropped}
+
+
+def setup_logging(level: int | None = None):
+    """Installe la file de logs sur le logger racine (idempotent)"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+    if level is None:
+        level = logging.DEBUG if DEV_MODE else logging.INFO
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _queue_handler = LazyQueueHandler(log_queue)
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(_queue_handler)
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -0,0 +1,117 @@
+"""
+Surveillance de la boucle asyncio.
+
+Une tâche mesure en continu le retard d'ordonnancement (lag) : un sleep de
+`interval` qui se réveille en retard indique que la boucle était occupée.
+Un thread à part vérifie que cette tâche tourne toujours : si la boucle est
+bloquée au-delà du seuil, il capture la pile du thread de la boucle (le
+callback fautif) et garde les blocages les plus longs pour /readyz.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+
+LOOP_LAG_INTERVAL = float(os.environ.get("LOOP_LAG_INTERVAL", "0.1"))
+LOOP_STALL_THRESHOLD = float(os.environ.get("LOOP_STALL_THRESHOLD", "0.25"))
+# Au-delà de ce lag (max sur la fenêtre), /readyz répond 503
+READY_MAX_LAG = float(os.environ.get("READY_MAX_LAG", "1.0"))
+# Fenêtre du lag maximum rapporté (secondes)
+LAG_WINDOW = 10
+MAX_STALLS = 20
+STACK_DEPTH = 12
+
+logger = logging.getLogger(__name__)
+
+
+class LoopWatchdog:
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, threshold: float = LOOP_STALL_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = 0.0
+        self.samples = deque(maxlen=max(1, int(LAG_WINDOW / interval)))
+        self.stalls = deque(maxlen=MAX_STALLS)
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id = None
+        self._task = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    # --- Mesure, dans la boucle ---
+
+    async def _measure(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - start - self.interval)
+            self.samples.append(self.lag)
+            self._heartbeat = time.monotonic()
+
+    # --- Détection des blocages, hors de la boucle ---
+
+    def _watch(self):
+        current = None
+        while not self._stop.wait(self.interval):
+            blocked = time.monotonic() - self._heartbeat - self.interval
+            if blocked <= self.threshold:
+                if current is not None:
+                    logger.warning(
+                        "Boucle asyncio bloquée pendant %d ms", current["blocked_ms"],
+                        extra={"stack": current["stack"]},
+                    )
+                current = None
+                continue
+            if current is None:
+                # Une seule capture de pile par blocage : celle du callback en cours
+                frame = sys._current_frames().get(self._loop_thread_id)
+                stack = traceback.format_stack(frame)[-STACK_DEPTH:] if frame else []
+                current = {"at": datetime.now().isoformat(), "blocked_ms": 0, "stack": "".join(stack)}
+                self.stalls.append(current)
+            current["blocked_ms"] = round(blocked * 1000)
+
+    # --- Cycle de vie ---
+
+    def start(self):
+        """À appeler depuis la boucle surveillée (lifespan)"""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._measure())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        self._stop.set()
+        self._thread.join(timeout=1)
+        self._thread = None
+
+    @property
+    def max_lag(self) -> float:
+        return max(self.samples, default=0.0)
+
+    def status(self, slowest: int = 5) -> dict:
+        stalls = sorted(self.stalls, key=lambda s: s["blocked_ms"], reverse=True)
+        return {
+            "running": self._task is not None,
+            "lag_ms": round(self.lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "stall_threshold_ms": round(self.threshold * 1000),
+            "stalls": len(self.stalls),
+            "slowest_stalls": stalls[:slowest],
+        }
+
+
+loop_watchdog = LoopWatchdog()
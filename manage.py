@@ -0,0 +1,55 @@
+"""
+Commandes d'administration de la base de données
+
+    python manage.py rebuild-stats              # recalcule les agrégats des conversations
+    python manage.py archive [--older-than 90]  # archive à froid les anciennes conversations
+"""
+
+import argparse
+import asyncio
+
+from archive import RETENTION_DAYS, archive_old_conversations
+from database import dispose_engine, init_db, rebuild_conversation_stats
+from log_config import setup_logging
+
+
+async def rebuild_stats(args):
+    await init_db()
+    count = await rebuild_conversation_stats()
+    print(f"✓ Statistiques recalculées pour {count} conversations")
+
+
+async def archive(args):
+    await init_db()
+    archived, missing = await archive_old_conversations(args.older_than)
+    print(f"✓ {len(archived)} conversations archivées: {archived}")
+    if missing:
+        print(f"⚠ {len(missing)} conversations introuvables (supprimées pendant l'export): {missing}")
+
+
+COMMANDS = {
+    "rebuild-stats": rebuild_stats,
+    "archive": archive,
+}
+
+
+async def main(args):
+    try:
+        await COMMANDS[args.command](args)
+    finally:
+        await dispose_engine()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rebuild-stats", help="Recalcule les agrégats des conversations")
+    archive_parser = subparsers.add_parser(
+        "archive", help="Exporte en JSONL compressé puis supprime les anciennes conversations"
+    )
+    archive_parser.add_argument(
+        "--older-than", type=int, default=RETENTION_DAYS, metavar="JOURS",
+        help=f"âge minimum en jours (défaut: RETENTION_DAYS={RETENTION_DAYS})",
+    )
+    setup_logging()
+    asyncio.run(main(parser.parse_args()))
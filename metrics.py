@@ -0,0 +1,7 @@
+"""Outils communs aux statistiques exposées sur /api/*-stats et aux benchmarks"""
+
+
+def percentile(samples, p: float) -> float:
+    """Valeur au rang p (0 à 1) d'échantillons non triés, 0 s'il n'y en a aucun"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0
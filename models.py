@@ -1,5 +1,6 @@
 from typing import Optional, List
 from datetime import datetime
+from sqlalchemy import JSON, Column, UniqueConstraint
 from sqlmodel import Field, SQLModel, Relationship
 
 # Table des Conversations (Sessions)
@@ -8,16 +9,58 @@ class Conversation(SQLModel, table=True):
     title: str
     created_at: datetime = Field(default_factory=datetime.now)
 
+    # Agrégats dénormalisés, mis à jour à chaque message final (voir add_message)
+    message_count: int = Field(default=0)
+    word_count: int = Field(default=0)
+    first_message_at: Optional[datetime] = None
+    last_message_at: Optional[datetime] = None
+    # langue source -> nombre de messages
+    language_counts: dict = Field(default_factory=dict, sa_column=Column(JSON))
+
+    # Conversation archivée : messages sortis de la base vers un fichier JSONL compressé
+    archived_at: Optional[datetime] = None
+    archive_path: Optional[str] = None
+
     messages: List["Message"] = Relationship(back_populates="conversation")
 
-# Table des Messages
+    @property
+    def duration_seconds(self) -> int:
+        if not self.first_message_at or not self.last_message_at:
+            return 0
+        return int((self.last_message_at - self.first_message_at).total_seconds())
+
+# Table des Messages (une phrase finale, indépendante des langues)
 class Message(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    conversation_id: int = Field(foreign_key="conversation.id") # Lien vers la session
-    
-    fr: str
-    es: str
+    conversation_id: int = Field(foreign_key="conversation.id", index=True) # Lien vers la session
+
     timestamp: datetime
     source_language: str
 
-    conversation: Optional[Conversation] = Relationship(back_populates="messages")
\ No newline at end of file
+    conversation: Optional[Conversation] = Relationship(back_populates="messages")
+    # Chargées avec le message (selectin) : pas de lazy-load possible en async
+    translations: List["Translation"] = Relationship(
+        back_populates="message",
+        sa_relationship_kwargs={"lazy": "selectin", "cascade": "all, delete-orphan"},
+    )
+
+    def to_dict(self) -> dict:
+        """Format envoyé aux clients (load_history / display_message)"""
+        return {
+            "id": self.id,
+            "translations": {t.lang: t.text for t in self.translations},
+            "timestamp": self.timestamp.isoformat(),
+            "source_language": self.source_language,
+        }
+
+# Table des Traductions (une ligne par message et par langue)
+class Translation(SQLModel, table=True):
+    __table_args__ = (UniqueConstraint("message_id", "lang"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    message_id: int = Field(foreign_key="message.id", index=True)
+
+    lang: str
+    text: str
+
+    message: Optional[Message] = Relationship(back_populates="translations")
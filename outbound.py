@@ -0,0 +1,148 @@
+"""
+Émissions Socket.IO par ordre de priorité.
+
+Trois voies :
+    - control : commandes et états (start/stop, recognition_state, drain) ;
+      émises tout de suite, sans file
+    - final : messages finaux, file FIFO, jamais abandonnés
+    - interim : résultats intermédiaires, un seul en attente par room (le plus
+      récent remplace le précédent, un final de la même room l'annule)
+Les finals et intermédiaires sont émis par une tâche de fond qui rend la main
+à la boucle entre deux émissions : une commande reçue pendant un flot de
+sous-titres n'attend pas qu'il soit écoulé.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+
+from metrics import percentile
+
+CONTROL = "control"
+FINAL = "final"
+INTERIM = "interim"
+LANES = (CONTROL, FINAL, INTERIM)
+
+# Latences gardées par voie pour les percentiles
+LATENCY_SAMPLES = 1000
+
+logger = logging.getLogger(__name__)
+
+
+class LaneStats:
+    __slots__ = ("sent", "dropped", "errors", "latencies")
+
+    def __init__(self):
+        self.sent = 0
+        self.dropped = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, latency: float):
+        self.sent += 1
+        self.latencies.append(latency)
+
+    def to_dict(self) -> dict:
+        return {
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "latency_p50_ms": round(percentile(self.latencies, 0.5) * 1000, 3),
+            "latency_p95_ms": round(percentile(self.latencies, 0.95) * 1000, 3),
+            "latency_max_ms": round(max(self.latencies, default=0) * 1000, 3),
+        }
+
+
+class OutboundScheduler:
+    def __init__(self):
+        self.sio = None
+        self.stats = {lane: LaneStats() for lane in LANES}
+        # (event, data, kwargs, instant de mise en file)
+        self._finals: deque[tuple] = deque()
+        self._interims: OrderedDict[str, tuple] = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    # --- Mise en file ---
+
+    async def emit_control(self, event: str, data=None, **kwargs):
+        """Voie prioritaire : émise immédiatement"""
+        start = time.perf_counter()
+        try:
+            await self.sio.emit(event, data, **kwargs)
+        except Exception as e:
+            self.stats[CONTROL].errors += 1
+            logger.error("Erreur d'émission %s: %s", event, e)
+            return
+        self.stats[CONTROL].record(time.perf_counter() - start)
+
+    def send_final(self, event: str, data, key: str, **kwargs):
+        # Le final rend caduc l'intermédiaire en attente pour la même room
+        if self._interims.pop(key, None) is not None:
+            self.stats[INTERIM].dropped += 1
+        self._finals.append((event, data, kwargs, time.perf_counter()))
+        self._wakeup.set()
+
+    def send_interim(self, event: str, data, key: str, **kwargs):
+        if self._interims.pop(key, None) is not None:
+            self.stats[INTERIM].dropped += 1
+        self._interims[key] = (event, data, kwargs, time.perf_counter())
+        self._wakeup.set()
+
+    # --- Émission ---
+
+    def _next(self):
+        if self._finals:
+            return FINAL, self._finals.popleft()
+        if self._interims:
+            return INTERIM, self._interims.popitem(last=False)[1]
+        return None, None
+
+    async def _emit(self, lane: str, item: tuple):
+        event, data, kwargs, queued_at = item
+        try:
+            await self.sio.emit(event, data, **kwargs)
+        except Exception as e:
+            self.stats[lane].errors += 1
+            logger.error("Erreur d'émission %s: %s", event, e)
+            return
+        self.stats[lane].record(time.perf_counter() - queued_at)
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            lane, item = self._next()
+            while item is not None:
+                await self._emit(lane, item)
+                # Laisse passer les événements entrants (commandes) entre deux émissions
+                await asyncio.sleep(0)
+                lane, item = self._next()
+
+    # --- Cycle de vie ---
+
+    def start(self, sio):
+        self.sio = sio
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Arrête la tâche après avoir émis les finals encore en file"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        self._interims.clear()
+        while self._finals:
+            await self._emit(FINAL, self._finals.popleft())
+
+    def queue_stats(self) -> dict:
+        return {
+            "queued_finals": len(self._finals),
+            "queued_interims": len(self._interims),
+            "lanes": {lane: stats.to_dict() for lane, stats in self.stats.items()},
+        }
+
+
+outbound = OutboundScheduler()
@@ -1,10 +1,29 @@
 """
-Script pour remplir la base de données avec des données de test
+Script pour remplir la base de données avec des données de test, à l'échelle voulue
+
+    python populate_db.py                                              # ~1000 messages
+    python populate_db.py --messages 1000000 --conversations 2000 --seed 42
+    python populate_db.py --messages 10000 --events-out storage/events.jsonl
+
+Les messages sont générés de façon déterministe (--seed) et insérés en masse,
+par transactions de --batch-size messages. --events-out écrit en plus le flux
+complet interim/final (format de new_translation) pour rejouer une session.
 """
 
+import argparse
 import asyncio
+import json
+import random
+import time
 from datetime import datetime, timedelta
-from database import init_db, create_conversation, add_message
+from database import (
+    bulk_insert,
+    count_words,
+    dispose_engine,
+    get_max_ids,
+    init_db,
+    source_text,
+)
 
 # Données de test pour les conversations
 CONVERSATION_TITLES = [
@@ -18,7 +37,7 @@ CONVERSATION_TITLES = [
     "Brainstorming créatif",
 ]
 
-# Messages de test (français -> espagnol)
+# Phrases de test (français -> espagnol), combinées pour produire les messages
 MESSAGES_DATA = [
     # Conversation 1 - Réunion client
     [
@@ -171,49 +190,170 @@ MESSAGES_DATA = [
 ]
 
 
-async def populate_database():
+PHRASES = [(fr, es) for conversation in MESSAGES_DATA for fr, es, _ in conversation]
+SOURCE_LANGUAGES = {"fr": "fr-FR", "es": "es-MX"}
+# Fin de la période générée : date fixe pour qu'une même graine donne les mêmes données
+END_DATE = datetime(2025, 1, 1)
+
+
+def parse_range(value: str) -> tuple[int, int]:
+    """ "1:3" -> (1, 3), "2" -> (2, 2)"""
+    low, _, high = value.partition(":")
+    return int(low), int(high or low)
+
+
+def split_messages(rng: random.Random, total: int, conversations: int) -> list[int]:
+    """Répartit les messages entre conversations (tailles inégales, comme en réel)"""
+    weights = [rng.paretovariate(1.5) for _ in range(conversations)]
+    scale = total / sum(weights)
+    sizes = [int(w * scale) for w in weights]
+    for i in range(total - sum(sizes)):
+        sizes[i % conversations] += 1
+    return sizes
+
+
+def make_phrase(rng: random.Random, fragments: tuple[int, int]) -> tuple[str, str]:
+    pairs = [rng.choice(PHRASES) for _ in range(rng.randint(*fragments))]
+    return " ".join(fr for fr, _ in pairs), " ".join(es for _, es in pairs)
+
+
+def interim_events(rng: random.Random, translations: dict, lang: str, mean: float):
+    """Résultats intermédiaires d'une phrase : préfixes de plus en plus longs"""
+    count = int(rng.expovariate(1 / mean)) if mean > 0 else 0
+    words = {code: text.split() for code, text in translations.items()}
+    longest = max(len(w) for w in words.values())
+    for step in range(1, count + 1):
+        cut = max(1, longest * step // (count + 1))
+        yield {
+            "lang": lang,
+            "translations": {code: " ".join(w[:cut]) for code, w in words.items()},
+            "is_final": False,
+        }
+
+
+async def populate_database(args):
     """Remplit la base de données avec des données de test"""
+    rng = random.Random(args.seed)
     print("Initialisation de la base de données...")
     await init_db()
     print("✓ Base de données initialisée\n")
 
-    conversations = []
+    conv_id, msg_id = await get_max_ids()
+    sizes = split_messages(rng, args.messages, args.conversations)
+    starts = sorted(args.end_date - timedelta(days=args.days * rng.random()) for _ in sizes)
+    events_file = open(args.events_out, "w", encoding="utf-8") if args.events_out else None
 
-    # Créer les conversations
-    print("Création des conversations...")
-    for i, title in enumerate(CONVERSATION_TITLES):
-        conv = await create_conversation(title)
-        conversations.append(conv)
-        print(f"✓ Conversation créée: {title} (ID: {conv.id})")
-    print()
+    conversations, messages, translations = [], [], []
+    inserted = 0
+    started = time.perf_counter()
 
-    # Ajouter les messages à chaque conversation
-    print("Ajout des messages...")
-    base_time = datetime.now() - timedelta(days=7)  # Commencer il y a 7 jours
+    async def flush():
+        nonlocal inserted
+        await bulk_insert(conversations, messages, translations)
+        inserted += len(messages)
+        conversations.clear()
+        messages.clear()
+        translations.clear()
+        rate = inserted / (time.perf_counter() - started)
+        print(f"✓ {inserted}/{args.messages} messages insérés ({rate:,.0f} msg/s)")
 
-    for conv_idx, conv in enumerate(conversations):
-        messages = MESSAGES_DATA[conv_idx] if conv_idx < len(MESSAGES_DATA) else []
+    print(f"Génération de {args.messages} messages dans {args.conversations} conversations...")
+    for size, start in zip(sizes, starts):
+        conv_id += 1
+        conv = {
+            "id": conv_id,
+            "title": f"{rng.choice(CONVERSATION_TITLES)} #{conv_id}",
+            "created_at": start,
+            "message_count": size,
+            "word_count": 0,
+            "first_message_at": None,
+            "last_message_at": None,
+            "language_counts": {},
+        }
+        # Messages générés d'abord : la conversation est insérée avant eux,
+        # avec ses agrégats complets, même si un lot se termine au milieu
+        conv_messages = []
+        timestamp = start
+        for _ in range(size):
+            msg_id += 1
+            timestamp += timedelta(seconds=rng.uniform(2, 12))
+            fr, es = make_phrase(rng, args.phrase_fragments)
+            texts = {"fr": fr, "es": es}
+            source = SOURCE_LANGUAGES["fr" if rng.random() < args.fr_ratio else "es"]
+
+            conv_messages.append((
+                {
+                    "id": msg_id,
+                    "conversation_id": conv_id,
+                    "timestamp": timestamp,
+                    "source_language": source,
+                },
+                [
+                    {"message_id": msg_id, "lang": lang, "text": text}
+                    for lang, text in texts.items()
+                ],
+            ))
+            conv["word_count"] += count_words(source_text(texts, source))
+            conv["language_counts"][source] = conv["language_counts"].get(source, 0) + 1
+            conv["first_message_at"] = conv["first_message_at"] or timestamp
+            conv["last_message_at"] = timestamp
+
+            if events_file:
+                for event in interim_events(rng, texts, source, args.interims_per_final):
+                    events_file.write(json.dumps(event, ensure_ascii=False) + "\n")
+                final = {
+                    "lang": source,
+                    "translations": texts,
+                    "timestamp": timestamp.isoformat(),
+                    "is_final": True,
+                }
+                events_file.write(json.dumps(final, ensure_ascii=False) + "\n")
+
+        conversations.append(conv)
+        for message, message_translations in conv_messages:
+            messages.append(message)
+            translations.extend(message_translations)
+            if len(messages) >= args.batch_size:
+                await flush()
+    await flush()
 
-        for msg_idx, (fr, es, source_lang) in enumerate(messages):
-            # Créer un timestamp progressif pour chaque message
-            timestamp = base_time + timedelta(
-                days=conv_idx, hours=msg_idx * 2, minutes=msg_idx * 15
-            )
+    if events_file:
+        events_file.close()
+        print(f"✓ Flux interim/final écrit dans {args.events_out}")
+    elapsed = time.perf_counter() - started
+    print(f"\n✓ Base de données remplie avec succès en {elapsed:.1f}s !")
+    print(f"  - {len(sizes)} conversations créées")
+    print(f"  - {args.messages} messages créés")
 
-            await add_message(
-                conversation_id=conv.id,
-                fr=fr,
-                es=es,
-                source_language=source_lang,
-                timestamp=timestamp,
-            )
-            print(f"✓ Message ajouté à la conversation {conv.id}: {fr[:50]}...")
 
-    print(f"\n✓ Base de données remplie avec succès !")
-    print(f"  - {len(conversations)} conversations créées")
-    total_messages = sum(len(msgs) for msgs in MESSAGES_DATA)
-    print(f"  - {total_messages} messages créés")
+async def main(args):
+    try:
+        await populate_database(args)
+    finally:
+        await dispose_engine()
 
 
 if __name__ == "__main__":
-    asyncio.run(populate_database())
+    parser = argparse.ArgumentParser(description="Remplit la base avec des données de test")
+    parser.add_argument("--messages", type=int, default=1000, help="nombre total de messages finaux")
+    parser.add_argument("--conversations", type=int, default=len(CONVERSATION_TITLES))
+    parser.add_argument("--seed", type=int, default=0, help="graine (même graine = mêmes données)")
+    parser.add_argument("--days", type=float, default=30, help="période couverte, en jours")
+    parser.add_argument(
+        "--end-date", type=datetime.fromisoformat, default=END_DATE, metavar="AAAA-MM-JJ",
+        help=f"fin de la période couverte (défaut: {END_DATE.date()})",
+    )
+    parser.add_argument("--batch-size", type=int, default=50_000, help="messages par transaction")
+    parser.add_argument(
+        "--phrase-fragments", type=parse_range, default=(1, 3), metavar="MIN:MAX",
+        help="nombre de phrases du corpus assemblées par message",
+    )
+    parser.add_argument("--fr-ratio", type=float, default=0.7, help="part des messages parlés en français")
+    parser.add_argument(
+        "--interims-per-final", type=float, default=6,
+        help="nombre moyen de résultats intermédiaires par phrase (avec --events-out)",
+    )
+    parser.add_argument("--events-out", help="fichier JSONL du flux interim/final à rejouer")
+    args = parser.parse_args()
+    args.conversations = max(1, min(args.conversations, args.messages))
+    asyncio.run(main(args))
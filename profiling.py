@@ -0,0 +1,183 @@
+"""
+Profilage à la demande des handlers Socket.IO et des routes FastAPI.
+
+Pendant une fenêtre bornée, les handlers sont remplacés par des versions
+instrumentées (temps par appel, échantillonné) ; à la fin de la fenêtre les
+originaux sont remis en place : hors profilage, aucun coût.
+Optionnellement, tracemalloc compare la mémoire allouée entre début et fin.
+"""
+
+import asyncio
+import functools
+import inspect
+import random
+import time
+import tracemalloc
+from datetime import datetime
+
+from fastapi.routing import APIRoute
+
+MAX_DURATION = 600
+TOP_ALLOCATIONS = 25
+
+
+class HandlerStats:
+    __slots__ = ("calls", "sampled", "total", "max", "errors")
+
+    def __init__(self):
+        self.calls = 0
+        self.sampled = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+
+    def to_dict(self) -> dict:
+        mean = self.total / self.sampled if self.sampled else 0
+        return {
+            "calls": self.calls,
+            "sampled": self.sampled,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(mean * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "errors": self.errors,
+        }
+
+
+class Profiler:
+    def __init__(self):
+        self.active = False
+        self.started_at = None
+        self.ends_at = None
+        self.sample_rate = 1.0
+        self.trace_malloc = False
+        self.stats: dict[str, HandlerStats] = {}
+        self.allocations: list[dict] = []
+        self._originals: list[tuple] = []
+        self._malloc_start = None
+        self._stop_handle = None
+        self._report = None
+
+    # --- Instrumentation ---
+
+    def _instrument(self, name: str, func):
+        stats = self.stats.setdefault(name, HandlerStats())
+        signature = inspect.signature(func)
+
+        # functools.wraps expose la signature d'origine ; un appel avec de mauvais
+        # arguments lève TypeError avant tout comptage, comme le handler non instrumenté
+        # (python-socketio rappelle alors connect/disconnect avec moins d'arguments)
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            signature.bind(*args, **kwargs)
+            stats.calls += 1
+            if random.random() >= self.sample_rate:
+                return await func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                stats.errors += 1
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                stats.sampled += 1
+                stats.total += elapsed
+                stats.max = max(stats.max, elapsed)
+
+        return wrapper
+
+    def _wrap_all(self, sio, app):
+        for namespace, handlers in sio.handlers.items():
+            for event, handler in list(handlers.items()):
+                if inspect.iscoroutinefunction(handler):
+                    self._originals.append((handlers, event, handler))
+                    handlers[event] = self._instrument(f"sio {event}", handler)
+        for route in app.routes:
+            call = getattr(route, "dependant", None) and route.dependant.call
+            if isinstance(route, APIRoute) and inspect.iscoroutinefunction(call):
+                self._originals.append((route.dependant, "call", call))
+                route.dependant.call = self._instrument(
+                    f"{','.join(sorted(route.methods))} {route.path}", call
+                )
+
+    def _unwrap_all(self):
+        for target, key, original in self._originals:
+            if isinstance(target, dict):
+                target[key] = original
+            else:
+                setattr(target, key, original)
+        self._originals.clear()
+
+    # --- Fenêtre de profilage ---
+
+    def start(self, sio, app, duration: float, sample_rate: float, trace_malloc: bool):
+        if self.active:
+            self.stop()
+        duration = min(max(duration, 1), MAX_DURATION)
+        self.stats = {}
+        self.allocations = []
+        self._report = None
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.trace_malloc = trace_malloc
+        self.started_at = datetime.now()
+        self.ends_at = time.monotonic() + duration
+        if trace_malloc:
+            tracemalloc.start()
+            self._malloc_start = tracemalloc.take_snapshot()
+        self._wrap_all(sio, app)
+        self.active = True
+        self._stop_handle = asyncio.get_running_loop().call_later(duration, self.stop)
+
+    def stop(self):
+        if not self.active:
+            return
+        self._unwrap_all()
+        if self._stop_handle is not None:
+            self._stop_handle.cancel()
+            self._stop_handle = None
+        if self.trace_malloc:
+            diff = tracemalloc.take_snapshot().compare_to(self._malloc_start, "lineno")
+            self.allocations = [
+                {
+                    "location": str(stat.traceback),
+                    "size_diff_kb": round(stat.size_diff / 1024, 1),
+                    "count_diff": stat.count_diff,
+                }
+                for stat in diff[:TOP_ALLOCATIONS]
+            ]
+            self._malloc_start = None
+            tracemalloc.stop()
+        self.active = False
+        self._report = self._build_report(datetime.now())
+
+    def _build_report(self, stopped_at) -> dict:
+        handlers = sorted(
+            ((name, stats.to_dict()) for name, stats in self.stats.items() if stats.calls),
+            key=lambda item: item[1]["total_ms"],
+            reverse=True,
+        )
+        return {
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "stopped_at": stopped_at.isoformat() if stopped_at else None,
+            "sample_rate": self.sample_rate,
+            "tracemalloc": self.trace_malloc,
+            "handlers": dict(handlers),
+            "allocations": self.allocations,
+        }
+
+    def status(self) -> dict:
+        return {
+            "active": self.active,
+            "remaining_s": round(max(0, self.ends_at - time.monotonic()), 1) if self.active else 0,
+            "sample_rate": self.sample_rate,
+            "tracemalloc": self.trace_malloc,
+        }
+
+    def report(self) -> dict | None:
+        """Rapport de la dernière fenêtre (ou état partiel si elle est en cours)"""
+        if self.active:
+            return self._build_report(None)
+        return self._report
+
+
+profiler = Profiler()
@@ -0,0 +1,206 @@
+"""
+Limitation de débit (token bucket) et contrôle d'admission des connexions Socket.IO.
+
+Les limites se configurent par variables d'environnement au format "nombre/secondes",
+ex: RATE_LIMIT_TOKEN="5/60" = 5 requêtes (rafale) puis 5 par minute.
+"""
+
+import asyncio
+import ipaddress
+import os
+import random
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+
+def parse_rate(value: str) -> tuple[float, float]:
+    """ "5/60" -> (5 jetons max, 5/60 jetons par seconde)"""
+    count, _, period = value.partition("/")
+    capacity = float(count)
+    return capacity, capacity / float(period or 1)
+
+
+def _parse_networks(value: str) -> list:
+    return [ipaddress.ip_network(item.strip(), strict=False) for item in value.split(",") if item.strip()]
+
+
+# Proxys (nginx...) dont on accepte l'en-tête X-Forwarded-For, IP ou réseaux CIDR
+TRUSTED_PROXIES = _parse_networks(os.environ.get("TRUSTED_PROXIES", "127.0.0.1,::1"))
+
+
+def is_trusted_proxy(ip: str | None) -> bool:
+    try:
+        address = ipaddress.ip_address(ip or "")
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+
+def client_ip(forwarded_for: str, peer: str | None) -> str:
+    """
+    IP du client. X-Forwarded-For n'est lu que si la connexion vient d'un proxy de
+    confiance, et de droite à gauche : la première IP hors proxys de confiance est
+    celle ajoutée par notre proxy, le reste est fourni (et falsifiable) par le client.
+    """
+    ip = peer
+    if is_trusted_proxy(peer):
+        for hop in reversed([item.strip() for item in forwarded_for.split(",") if item.strip()]):
+            ip = hop
+            if not is_trusted_proxy(hop):
+                break
+    return ip or "unknown"
+
+
+def environ_client_ip(environ: dict) -> str:
+    """
+    IP du client d'une connexion Socket.IO. Le pilote ASGI d'engine.io met toujours
+    REMOTE_ADDR à 127.0.0.1 : le vrai pair est dans le scope ASGI.
+    """
+    client = (environ.get("asgi.scope") or {}).get("client")
+    peer = client[0] if client else environ.get("REMOTE_ADDR")
+    return client_ip(environ.get("HTTP_X_FORWARDED_FOR", ""), peer)
+
+
+def with_jitter(delay: float) -> float:
+    """Délai étalé entre delay et 2*delay pour que les clients ne reviennent pas ensemble"""
+    return round(delay * (1 + random.random()), 2)
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, capacity: float):
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+
+class RateLimiter:
+    """Un token bucket par clé (IP, session...), les clés inactives sont évincées (LRU)"""
+
+    def __init__(self, name: str, rate: str, max_keys: int = 10_000):
+        self.name = name
+        self.capacity, self.refill = parse_rate(rate)
+        self.max_keys = max_keys
+        self.buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+        self.allowed = 0
+        self.rejected = 0
+
+    def _bucket(self, key: str, now: float) -> TokenBucket:
+        """Bucket de la clé, rechargé des jetons gagnés depuis son dernier usage"""
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(self.capacity)
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+            bucket.tokens = min(
+                self.capacity, bucket.tokens + (now - bucket.updated) * self.refill
+            )
+        bucket.updated = now
+        return bucket
+
+    def check(self, *keys: str) -> float:
+        """
+        Toutes les clés doivent avoir un jeton (ex: par IP et par session) : 0 si
+        autorisé, sinon le nombre de secondes à attendre. Les jetons ne sont
+        consommés que si toutes les clés l'autorisent.
+        """
+        now = time.monotonic()
+        buckets = [self._bucket(key, now) for key in keys if key]
+        wait = max(((1 - b.tokens) / self.refill for b in buckets if b.tokens < 1), default=0)
+        if wait:
+            self.rejected += 1
+            return wait
+        for bucket in buckets:
+            bucket.tokens -= 1
+        self.allowed += 1
+        return 0
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "refill_per_second": round(self.refill, 4),
+            "tracked_keys": len(self.buckets),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+        }
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class ConnectAdmission:
+    """
+    Limite le nombre de connexions traitées en même temps (envoi d'historique...).
+    Les connexions en excès attendent dans une file bornée ; au-delà elles sont
+    refusées avec un délai de reconnexion (retry_after) proportionnel à la file.
+    """
+
+    def __init__(self, max_inflight: int, max_queue: int, base_delay: float = 1.0):
+        self.max_queue = max_queue
+        self.base_delay = base_delay
+        self._semaphore = asyncio.Semaphore(max_inflight)
+        self.max_inflight = max_inflight
+        self.inflight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def retry_after(self) -> float:
+        return with_jitter(self.base_delay * (1 + self.queued / max(1, self.max_inflight)))
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._semaphore.locked() and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected(self.retry_after())
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self.inflight += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.inflight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_inflight": self.max_inflight,
+            "max_queue": self.max_queue,
+            "inflight": self.inflight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+# --- Instances de l'application ---
+
+token_limiter = RateLimiter("get-token", os.environ.get("RATE_LIMIT_TOKEN", "5/60"))
+login_limiter = RateLimiter("login", os.environ.get("RATE_LIMIT_LOGIN", "10/300"))
+# Par IP : les viewers d'une salle partagent souvent la même IP (NAT, Wi-Fi du lieu) ;
+# les tempêtes de reconnexion sont absorbées par connect_admission
+connect_limiter = RateLimiter("connect", os.environ.get("RATE_LIMIT_CONNECT", "600/60"))
+connect_admission = ConnectAdmission(
+    max_inflight=int(os.environ.get("CONNECT_MAX_INFLIGHT", "50")),
+    max_queue=int(os.environ.get("CONNECT_MAX_QUEUE", "500")),
+)
+
+
+def limiter_stats() -> dict:
+    return {
+        "limiters": {
+            limiter.name: limiter.stats()
+            for limiter in (token_limiter, login_limiter, connect_limiter)
+        },
+        "connect_admission": connect_admission.stats(),
+    }
@@ -0,0 +1,144 @@
+"""
+Mode relais : une instance de l'application qui ne reçoit pas le master mais
+s'abonne à un serveur amont comme un seul client, garde sa propre fenêtre
+d'historique et sert ses viewers avec le même protocole (load_history,
+display_message, update_message, clear_screen). La charge de l'origine ne dépend donc pas du
+nombre de viewers derrière les relais.
+
+    RELAY_UPSTREAM=https://origine.example.com uvicorn app:socket_app
+
+Après une coupure, le relais se réabonne avec le dernier id reçu : l'amont ne
+renvoie que les messages manquants.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime
+
+import socketio
+
+RELAY_UPSTREAM = os.environ.get("RELAY_UPSTREAM", "").rstrip("/") or None
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamRelay:
+    def __init__(
+        self, url: str, languages: list[str], on_history, on_message, on_update, on_clear
+    ):
+        self.url = url
+        self.languages = languages
+        # Callbacks de l'application : (conversation_id, messages, incremental), (message),
+        # (complément d'un final), (payload)
+        self.on_history = on_history
+        self.on_message = on_message
+        self.on_update = on_update
+        self.on_clear = on_clear
+        self.conversation_id = None
+        self.last_id = None  # dernier message final reçu (numéro de séquence de l'amont)
+        self.connected = False
+        self.connects = 0
+        self.last_event_at = None
+        self.client = None
+        self._task = None
+
+    # --- Événements de l'amont ---
+
+    async def _subscribe(self):
+        await self.client.emit(
+            "subscribe",
+            {
+                "languages": self.languages,
+                "conversation_id": self.conversation_id,
+                "after_id": self.last_id,
+            },
+        )
+
+    async def _on_connect(self):
+        self.connected = True
+        self.connects += 1
+        logger.info("Relais connecté à %s (reprise après l'id %s)", self.url, self.last_id)
+        await self._subscribe()
+
+    async def _on_disconnect(self, *args):
+        self.connected = False
+        logger.warning("Relais déconnecté de %s", self.url)
+
+    async def _on_load_history(self, payload):
+        self.last_event_at = datetime.now()
+        messages = payload["messages"]
+        incremental = (
+            payload.get("after_id") is not None
+            and payload["conversation_id"] == self.conversation_id
+        )
+        self.conversation_id = payload["conversation_id"]
+        if messages:
+            self.last_id = messages[-1]["id"]
+        elif not incremental:
+            self.last_id = None
+        await self.on_history(self.conversation_id, messages, incremental)
+
+    async def _on_display_message(self, data):
+        self.last_event_at = datetime.now()
+        if data.get("is_final") and data.get("id") is not None:
+            if self.last_id is not None and data["id"] <= self.last_id:
+                return
+            self.last_id = data["id"]
+        await self.on_message(data)
+
+    async def _on_update_message(self, data):
+        self.last_event_at = datetime.now()
+        await self.on_update(data)
+
+    async def _on_clear_screen(self, payload=None):
+        self.last_event_at = datetime.now()
+        self.conversation_id = (payload or {}).get("conversation_id")
+        self.last_id = None
+        await self.on_clear(payload)
+
+    async def _on_subscribe_retry(self, data):
+        await asyncio.sleep(data.get("retry_after", 1))
+        await self._subscribe()
+
+    # --- Cycle de vie ---
+
+    def start(self):
+        # handle_sigint=False : l'arrêt (SIGINT de pm2) reste géré par uvicorn et le lifespan
+        self.client = socketio.AsyncClient(
+            reconnection_delay=1, reconnection_delay_max=30, randomization_factor=0.5,
+            handle_sigint=False,
+        )
+        self.client.on("connect", self._on_connect)
+        self.client.on("disconnect", self._on_disconnect)
+        self.client.on("load_history", self._on_load_history)
+        self.client.on("display_message", self._on_display_message)
+        self.client.on("update_message", self._on_update_message)
+        self.client.on("clear_screen", self._on_clear_screen)
+        self.client.on("subscribe_retry", self._on_subscribe_retry)
+        # retry=True : premières tentatives avec la même temporisation que les reconnexions
+        self._task = asyncio.get_running_loop().create_task(
+            self.client.connect(
+                self.url,
+                headers={"Referer": f"{self.url}/viewer"},
+                transports=["websocket"],
+                retry=True,
+            )
+        )
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.client is not None:
+            await self.client.disconnect()
+
+    def status(self) -> dict:
+        return {
+            "upstream": self.url,
+            "connected": self.connected,
+            "connects": self.connects,
+            "conversation_id": self.conversation_id,
+            "last_id": self.last_id,
+            "last_event_at": self.last_event_at.isoformat() if self.last_event_at else None,
+        }
@@ -0,0 +1,155 @@
+"""
+Démarrage rapide de la reconnaissance (master.html).
+
+    - token Azure gardé en cache côté serveur et renouvelé en arrière-plan :
+      /api/get-token et start_recognition_command le fournissent sans aller-retour
+      vers Microsoft
+    - latences de démarrage mesurées par le master (commande -> premier
+      résultat intermédiaire) et renvoyées au serveur, par session chaude/froide
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+
+from metrics import percentile
+
+SPEECH_KEY = os.environ.get("SPEECH_KEY")
+SPEECH_REGION = os.environ.get("SPEECH_REGION")
+
+# Un token Azure est valable 10 minutes ; on ne distribue que ceux qui ont
+# encore au moins TOKEN_MIN_REMAINING secondes devant eux
+TOKEN_LIFETIME = 600
+TOKEN_MIN_REMAINING = 180
+
+# Démarrages gardés pour les percentiles
+LATENCY_SAMPLES = 200
+
+logger = logging.getLogger(__name__)
+
+
+class TokenCache:
+    def __init__(self):
+        self.token = None
+        self.fetched_at = 0.0
+        self.hits = 0
+        self.fetches = 0
+        self.errors = 0
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    def expires_in(self) -> float:
+        return TOKEN_LIFETIME - (time.monotonic() - self.fetched_at)
+
+    def _fresh(self) -> bool:
+        return self.token is not None and self.expires_in() >= TOKEN_MIN_REMAINING
+
+    def _payload(self) -> dict:
+        return {
+            "token": self.token,
+            "region": SPEECH_REGION,
+            "expires_in": int(self.expires_in()),
+        }
+
+    def cached(self) -> dict | None:
+        """Token encore frais, sans attente (None s'il faut le renouveler)"""
+        if not self._fresh():
+            return None
+        self.hits += 1
+        return self._payload()
+
+    async def _fetch(self):
+        # Import différé : httpx ne sert qu'ici, inutile de le charger au démarrage
+        import httpx
+
+        url = f"https://{SPEECH_REGION}.api.cognitive.microsoft.com/sts/v1.0/issueToken"
+        async with httpx.AsyncClient() as client:
+            response = await client.post(url, headers={"Ocp-Apim-Subscription-Key": SPEECH_KEY})
+            response.raise_for_status()
+        self.token = response.text
+        self.fetched_at = time.monotonic()
+        self.fetches += 1
+
+    async def get(self) -> dict:
+        """
+        Token frais, demandé à Azure si besoin. Les appels simultanés partagent
+        la même requête. Les erreurs httpx sont propagées à l'appelant.
+        """
+        async with self._lock:
+            if self._fresh():
+                self.hits += 1
+            else:
+                try:
+                    await self._fetch()
+                except Exception:
+                    self.errors += 1
+                    raise
+            return self._payload()
+
+    def prefetch(self):
+        """Renouvelle le token en arrière-plan s'il n'est plus assez frais"""
+        if not SPEECH_KEY or not SPEECH_REGION or self._fresh():
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._prefetch())
+
+    async def _prefetch(self):
+        try:
+            await self.get()
+        except Exception as e:
+            logger.warning("Préchargement du token Azure impossible: %s", e)
+
+    def stats(self) -> dict:
+        return {
+            "cached": self.token is not None,
+            "expires_in": max(0, int(self.expires_in())) if self.token else 0,
+            "hits": self.hits,
+            "fetches": self.fetches,
+            "errors": self.errors,
+        }
+
+
+class StartLatencies:
+    """Démarrages rapportés par le master (recognition_latency)"""
+
+    def __init__(self):
+        self.samples: deque[dict] = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, data: dict):
+        try:
+            sample = {
+                "warm": bool(data.get("warm")),
+                "source": str(data.get("source", "local"))[:16],
+                "token": str(data.get("token", "fetch"))[:16],
+                "setup_ms": float(data["setup_ms"]),
+                "first_interim_ms": float(data["first_interim_ms"]),
+            }
+        except (KeyError, TypeError, ValueError):
+            return
+        self.samples.append(sample)
+
+    def stats(self) -> dict:
+        def summary(samples, field):
+            values = [s[field] for s in samples]
+            return {
+                "p50_ms": round(percentile(values, 0.5), 1),
+                "p95_ms": round(percentile(values, 0.95), 1),
+                "max_ms": round(max(values, default=0), 1),
+            }
+
+        result = {}
+        for kind, warm in (("warm", True), ("cold", False)):
+            samples = [s for s in self.samples if s["warm"] == warm]
+            result[kind] = {
+                "starts": len(samples),
+                "setup": summary(samples, "setup_ms"),
+                "first_interim": summary(samples, "first_interim_ms"),
+            }
+        result["last"] = self.samples[-1] if self.samples else None
+        return result
+
+
+speech_token = TokenCache()
+start_latencies = StartLatencies()
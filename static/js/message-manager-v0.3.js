@@ -0,0 +1,420 @@
+// static/js/message-manager-v0.3.js
+//
+// Rendu fenêtré : seules les lignes visibles (+ une marge) sont dans le DOM,
+// entourées de deux espaceurs qui donnent la hauteur totale de la conversation.
+// Les nœuds de ligne sont recyclés et les mises à jour reçues pendant une frame
+// sont appliquées en une seule fois (requestAnimationFrame).
+// Avec un TranscriptCache (viewer), la transcription est gardée dans IndexedDB :
+// affichée dès le chargement, même hors ligne, et à la reconnexion le serveur
+// n'envoie que les messages postérieurs au dernier message en cache.
+// Les langues traduites côté serveur arrivent après le final, en complément
+// (update_message, même id) : une langue absente reste vide en attendant.
+
+const ESTIMATED_ROW_HEIGHT = 72;   // hauteur supposée d'une ligne pas encore mesurée
+const OVERSCAN_ROWS = 8;           // lignes rendues au-dessus et en dessous de la zone visible
+const STICK_THRESHOLD = 100;       // px : en deçà, on considère l'utilisateur "en bas"
+
+class MessageManager {
+    constructor(socket, devMode = false, languages = ['fr', 'es'], cache = null) {
+        this.socket = socket;
+        this.devMode = devMode;
+        this.languages = languages;
+        this.cache = cache;
+        this.conversationId = null;
+        this.lastId = null;        // id du dernier message final reçu (numéro de séquence)
+
+        this.scrollContainer = document.getElementById('container-scroll');
+        this.conversation = document.getElementById('conversation');
+
+        this.rows = [];            // messages finaux (données seulement)
+        this.interim = null;       // phrase en cours, affichée après les finaux
+        this.interimVersion = 0;
+        this.heights = [];         // hauteur mesurée (ou estimée) de chaque ligne
+        this.offsets = [0];        // offsets[i] = hauteur cumulée des lignes avant i
+        this.dirtyFrom = 0;        // premier offset à recalculer
+        this.rendered = new Map(); // index -> nœud affiché
+        this.pool = [];            // nœuds libres, réutilisés
+        this.range = [0, -1];
+        this.pending = [];
+        this.toCache = [];         // finals à écrire dans IndexedDB à la prochaine frame
+        this.frameRequested = false;
+        this.stickToBottom = true;
+
+        this.topSpacer = document.createElement('div');
+        this.bottomSpacer = document.createElement('div');
+        this.conversation.replaceChildren(this.topSpacer, this.bottomSpacer);
+
+        if (this.scrollContainer) {
+            this.scrollContainer.addEventListener('scroll', () => {
+                const el = this.scrollContainer;
+                this.stickToBottom = el.scrollTop + el.clientHeight >= el.scrollHeight - STICK_THRESHOLD;
+                this.scheduleRender();
+            }, { passive: true });
+        }
+        // La largeur change la hauteur des lignes : on remesure tout
+        window.addEventListener('resize', () => {
+            this.heights = this.heights.map(() => ESTIMATED_ROW_HEIGHT);
+            this.dirtyFrom = 0;
+            this.range = [0, -1];
+            this.scheduleRender();
+        });
+
+        this.ready = this._restoreFromCache();
+        this.initSocketListeners();
+    }
+
+    initSocketListeners() {
+        // (Ré)abonnement aux langues affichées à chaque connexion : le serveur
+        // renvoie alors l'historique limité à ces langues
+        this.socket.on('connect', () => this.subscribe());
+        if (this.socket.connected) this.subscribe();
+
+        // Serveur saturé : il indique quand revenir (délai déjà étalé côté serveur)
+        this.socket.on('connect_error', (err) => {
+            if (err.data && err.data.retry_after) {
+                if (this.devMode) console.log("Connexion refusée, nouvel essai dans", err.data.retry_after, "s");
+                setTimeout(() => this.socket.connect(), err.data.retry_after * 1000);
+            }
+        });
+        // Redémarrage du serveur annoncé : chaque client tire son propre délai de
+        // reconnexion dans la fenêtre, pour ne pas revenir tous en même temps
+        this.socket.on('server_draining', (data) => {
+            const delay = 500 + Math.random() * data.reconnect_window * 1000;
+            if (this.devMode) console.log("Redémarrage du serveur, reconnexion dans", Math.round(delay), "ms");
+            this.socket.io.reconnectionDelay(delay);
+            this.socket.io.reconnectionDelayMax(delay * 2);
+        });
+        this.socket.on('connect', () => {
+            this.socket.io.reconnectionDelay(1000);
+            this.socket.io.reconnectionDelayMax(5000);
+        });
+        this.socket.on('subscribe_retry', (data) => {
+            setTimeout(() => this.subscribe(), data.retry_after * 1000);
+        });
+
+        this.socket.on('load_history', (payload) => {
+            const messages = Array.isArray(payload) ? payload : payload.messages;
+            const conversationId = Array.isArray(payload) ? null : payload.conversation_id;
+            // Suite de ce qu'on a déjà (cache local) : on ajoute, sinon on remplace tout
+            const incremental = !Array.isArray(payload) && payload.after_id !== null
+                && conversationId === this.conversationId;
+            if (this.devMode) console.log("Chargement historique:", messages.length, "messages", incremental ? "(reprise)" : "");
+            if (!incremental) {
+                this.clearConversation();
+                this._setConversation(conversationId, true);
+            }
+            messages.forEach(data => {
+                data.is_final = true;
+                this.addMessage(data);
+            });
+        });
+
+        this.socket.on('display_message', (data) => {
+            if (this.devMode) console.log("Nouveau message:", data);
+            this.addMessage(data);
+        });
+
+        this.socket.on('update_message', (data) => {
+            if (this.devMode) console.log("Complément du message", data.id, data.translations);
+            this.updateMessage(data);
+        });
+
+        this.socket.on('clear_screen', (payload) => {
+            this.clearConversation();
+            if (payload) this._setConversation(payload.conversation_id, true);
+        });
+    }
+
+    subscribe() {
+        // Attendre la relecture du cache : le serveur a besoin de notre dernier id
+        this.ready.then(() => {
+            this.socket.emit('subscribe', {
+                languages: this.languages,
+                conversation_id: this.conversationId,
+                after_id: this.lastId,
+            });
+        });
+    }
+
+    // --- Cache local ---
+
+    _room() {
+        return TranscriptCache.room(this.conversationId, this.languages);
+    }
+
+    async _restoreFromCache() {
+        if (!this.cache || this.cache.conversationId === null) return;
+        this.conversationId = this.cache.conversationId;
+        const messages = await this.cache.load(this._room());
+        if (this.devMode) console.log("Cache local:", messages.length, "messages");
+        messages.forEach(data => this.addMessage({ ...data, is_final: true }, false));
+    }
+
+    _setConversation(conversationId, reset) {
+        if (conversationId === null || conversationId === undefined) return;
+        this.conversationId = conversationId;
+        if (!this.cache) return;
+        if (reset) this.cache.clear(this._room());
+        this.cache.retain(conversationId);
+    }
+
+    // Change les langues affichées (ex: sélection de langue sur mobile)
+    setLanguages(languages) {
+        if (languages.join(',') === this.languages.join(',')) return;
+        this.languages = languages;
+        this.clearConversation();
+        this.pool = [];  // le nombre de colonnes change : les nœuds existants ne servent plus
+        this.ready = this._restoreFromCache();
+        this.subscribe();
+    }
+
+    clearConversation() {
+        this.pending = [];
+        this.toCache = [];
+        this.rows = [];
+        this.interim = null;
+        this.lastId = null;
+        this.heights = [];
+        this.offsets = [0];
+        this.dirtyFrom = 0;
+        this.rendered.forEach(node => this._release(node));
+        this.rendered.clear();
+        this.range = [0, -1];
+        this.stickToBottom = true;
+        this.topSpacer.style.height = '0px';
+        this.bottomSpacer.style.height = '0px';
+    }
+
+    scrollToBottom() {
+        this.stickToBottom = true;
+        this.scheduleRender();
+    }
+
+    // --- Réception : les mises à jour sont regroupées par frame ---
+
+    addMessage(data, store = true) {
+        const translations = data.translations || {};
+        // Un final est toujours gardé (numéro de séquence, complément à venir) ;
+        // un intermédiaire sans aucune des langues affichées est ignoré
+        const hasText = this.languages.some(lang => translations[lang] && translations[lang].trim() !== "");
+        if (!data.is_final && !hasText) return;
+        if (data.is_final && data.id !== undefined) {
+            // Déjà reçu (ex: message arrivé entre la lecture du cache et la reprise)
+            if (this.lastId !== null && data.id <= this.lastId) return;
+            this.lastId = data.id;
+            if (data.conversation_id !== undefined && data.conversation_id !== this.conversationId) {
+                this._setConversation(data.conversation_id, false);
+            }
+            if (store && this.cache) this.toCache.push(data);
+        }
+        this.pending.push(data);
+        this.scheduleRender();
+    }
+
+    // Langues ajoutées après coup à un final déjà reçu
+    updateMessage(data) {
+        if (data.conversation_id !== undefined && data.conversation_id !== this.conversationId) return;
+        this.pending.push({ ...data, update: true });
+        this.scheduleRender();
+    }
+
+    scheduleRender() {
+        if (this.frameRequested) return;
+        this.frameRequested = true;
+        requestAnimationFrame(() => this._render());
+    }
+
+    _applyPending() {
+        for (const data of this.pending) {
+            if (data.update) {
+                this._mergeUpdate(data);
+                continue;
+            }
+            if (data.is_final) {
+                this.rows.push(data);
+                this.interim = null;
+                // La ligne temporaire devient la ligne finale : même index, même hauteur
+                if (this.heights.length < this.rows.length) this.heights.push(ESTIMATED_ROW_HEIGHT);
+                const node = this.rendered.get(this.rows.length - 1);
+                if (node) node._key = null;
+            } else {
+                this.interim = data;
+                this.interimVersion++;
+                if (this.heights.length < this.rows.length + 1) this.heights.push(ESTIMATED_ROW_HEIGHT);
+            }
+            this.dirtyFrom = Math.min(this.dirtyFrom, this.rows.length - 1);
+        }
+        this.pending = [];
+        // Pas de phrase en cours : la hauteur réservée pour elle disparaît
+        if (!this.interim) this.heights.length = this.rows.length;
+    }
+
+    _mergeUpdate(data) {
+        for (let i = this.rows.length - 1; i >= 0; i--) {
+            const row = this.rows[i];
+            if (row.id === data.id) {
+                this.rows[i] = { ...row, translations: { ...row.translations, ...data.translations } };
+                const node = this.rendered.get(i);
+                if (node) node._key = null;
+                if (this.cache) this.toCache.push(this.rows[i]);
+                return;
+            }
+            if (row.id < data.id) return;
+        }
+    }
+
+    _count() {
+        return this.rows.length + (this.interim ? 1 : 0);
+    }
+
+    _updateOffsets() {
+        const count = this._count();
+        const from = Math.max(0, Math.min(this.dirtyFrom, count));
+        this.offsets.length = count + 1;
+        for (let i = from; i < count; i++) {
+            this.offsets[i + 1] = this.offsets[i] + this.heights[i];
+        }
+        this.dirtyFrom = count;
+    }
+
+    // Index de la ligne à la position y (recherche dichotomique dans les offsets)
+    _indexAt(y) {
+        let low = 0, high = this._count() - 1;
+        while (low < high) {
+            const mid = (low + high + 1) >> 1;
+            if (this.offsets[mid] <= y) low = mid; else high = mid - 1;
+        }
+        return Math.max(0, low);
+    }
+
+    // --- Rendu ---
+
+    _render() {
+        this.frameRequested = false;
+        this._applyPending();
+        if (this.toCache.length) {
+            this.cache.put(this._room(), this.toCache.map(({ is_final, ...msg }) => msg));
+            this.toCache = [];
+        }
+        const count = this._count();
+        this._updateOffsets();
+
+        const el = this.scrollContainer;
+        const viewHeight = el ? el.clientHeight : window.innerHeight;
+        const contentTop = el
+            ? this.topSpacer.getBoundingClientRect().top - el.getBoundingClientRect().top + el.scrollTop
+            : 0;
+        const viewTop = this.stickToBottom || !el
+            ? this.offsets[count] - viewHeight
+            : el.scrollTop - contentTop;
+
+        const start = count ? Math.max(0, this._indexAt(viewTop) - OVERSCAN_ROWS) : 0;
+        const end = count ? Math.min(count - 1, this._indexAt(viewTop + viewHeight) + OVERSCAN_ROWS) : -1;
+
+        this._placeRows(start, end);
+        this._measure(start, end);
+
+        this.topSpacer.style.height = `${this.offsets[start] || 0}px`;
+        this.bottomSpacer.style.height = `${this.offsets[count] - this.offsets[end + 1]}px`;
+
+        if (this.stickToBottom && el) {
+            // 'instant' : le scroll-smooth du conteneur ne doit pas retarder le suivi
+            el.scrollTo({ top: el.scrollHeight, behavior: 'instant' });
+        }
+    }
+
+    _placeRows(start, end) {
+        const [oldStart, oldEnd] = this.range;
+        // Les nœuds sortis de la fenêtre retournent dans le pool
+        for (const [index, node] of this.rendered) {
+            if (index < start || index > end) {
+                this.rendered.delete(index);
+                this._release(node);
+            }
+        }
+        for (let i = start; i <= end; i++) {
+            let node = this.rendered.get(i);
+            if (!node) {
+                node = this.pool.pop() || this._createRow();
+                node._key = null;
+                this.rendered.set(i, node);
+            }
+            this._fillRow(node, i);
+        }
+        // Réordonner le DOM seulement si la fenêtre a bougé
+        if (start !== oldStart || end !== oldEnd || this.conversation.childElementCount !== end - start + 3) {
+            const fragment = document.createDocumentFragment();
+            for (let i = start; i <= end; i++) fragment.appendChild(this.rendered.get(i));
+            this.conversation.insertBefore(fragment, this.bottomSpacer);
+        }
+        this.range = [start, end];
+    }
+
+    _measure(start, end) {
+        for (let i = start; i <= end; i++) {
+            const height = this.rendered.get(i).offsetHeight;
+            if (height && height !== this.heights[i]) {
+                this.heights[i] = height;
+                this.dirtyFrom = Math.min(this.dirtyFrom, i);
+            }
+        }
+        this._updateOffsets();
+    }
+
+    _release(node) {
+        node.remove();
+        if (node._columns === this.languages.length) this.pool.push(node);
+    }
+
+    // "fr-FR" correspond à la langue cible "fr"
+    _isSourceLang(sourceLang, lang) {
+        return sourceLang.toLowerCase().split('-')[0] === lang.toLowerCase().split('-')[0];
+    }
+
+    _createRow() {
+        const row = document.createElement('div');
+        row.className = 'msg-row grid gap-6 group hover:bg-white/5 transition-colors';
+        row.style.gridTemplateColumns = `repeat(${this.languages.length}, minmax(0, 1fr))`;
+        row._columns = this.languages.length;
+        row._texts = [];
+        row._times = [];
+        this.languages.forEach((lang, i) => {
+            const isLast = i === this.languages.length - 1;
+            const cell = document.createElement('div');
+            cell.className = isLast ? 'pl-2 py-2 self-stretch' : 'border-r border-zinc-700/50 pr-6 py-2 self-stretch';
+            const header = document.createElement('div');
+            header.className = 'text-xs text-zinc-500 mb-1 flex items-center gap-2 select-none min-h-[1.25rem]';
+            const time = document.createElement('span');
+            time.className = 'font-bold text-zinc-600';
+            header.appendChild(time);
+            const text = document.createElement('p');
+            text.className = `text-xl md:text-2xl font-normal ${i === 0 ? 'text-white' : 'text-accent'} leading-relaxed break-words`;
+            cell.append(header, text);
+            row.appendChild(cell);
+            row._texts.push(text);
+            row._times.push(time);
+        });
+        return row;
+    }
+
+    _fillRow(row, index) {
+        const isInterim = index === this.rows.length;
+        const data = isInterim ? this.interim : this.rows[index];
+        const key = isInterim ? `i${this.interimVersion}` : `f${index}`;
+        if (row._key === key) return;
+        row._key = key;
+
+        row.classList.toggle('opacity-60', isInterim);
+        row.classList.toggle('italic', isInterim);
+        row.classList.toggle('temp', isInterim);
+
+        const time = !isInterim && data.timestamp
+            ? new Date(data.timestamp).toLocaleTimeString('fr-FR', { hour: '2-digit', minute: '2-digit' })
+            : '';
+        const sourceLang = data.source_language || data.lang || 'unknown';
+        this.languages.forEach((lang, i) => {
+            row._texts[i].textContent = data.translations[lang] || '';
+            row._times[i].textContent = time && this._isSourceLang(sourceLang, lang) ? time : ' ';
+        });
+    }
+}
@@ -0,0 +1,76 @@
+// static/js/sw.js (servi sur /sw.js)
+//
+// Service worker du viewer : garde en cache la page et ses fichiers statiques
+// pour qu'un téléphone qui se réveille sans réseau affiche quand même la
+// transcription (stockée à part, dans IndexedDB par transcript-cache.js).
+// Le Socket.IO et les API ne passent jamais par le cache.
+// Portée limitée à /viewer : les pages master et télécommande ne sont pas contrôlées,
+// et seuls les fichiers du shell sont servis depuis le cache.
+
+const CACHE_NAME = 'viewer-shell-v3';
+const SCOPE = new URL('/viewer', self.location).href;
+const SHELL = [
+    '/viewer',
+    '/static/css/tailwind.css',
+    '/static/js/vendor/socket.io.js',
+    '/static/js/message-manager-v0.3.js',
+    '/static/js/transcript-cache.js',
+];
+
+self.addEventListener('install', (event) => {
+    event.waitUntil(
+        caches.open(CACHE_NAME)
+            .then(cache => cache.addAll(SHELL))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', (event) => {
+    // Ancienne installation à la portée "/" : elle se retire (le viewer réenregistre à /viewer)
+    if (self.registration.scope !== SCOPE) {
+        event.waitUntil(self.registration.unregister());
+        return;
+    }
+    // Anciennes versions du cache supprimées (CACHE_NAME change à chaque évolution du shell)
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(keys.filter(key => key !== CACHE_NAME).map(key => caches.delete(key))))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', (event) => {
+    const url = new URL(event.request.url);
+    if (event.request.method !== 'GET' || url.origin !== self.location.origin) return;
+    if (self.registration.scope !== SCOPE) return;
+
+    if (url.pathname === '/viewer') {
+        // Page : réseau d'abord (elle dépend de la configuration du serveur), cache hors ligne
+        event.respondWith(
+            fetch(event.request)
+                .then(response => {
+                    if (response.ok) {
+                        const copy = response.clone();
+                        caches.open(CACHE_NAME).then(cache => cache.put('/viewer', copy));
+                    }
+                    return response;
+                })
+                .catch(() => caches.match('/viewer'))
+        );
+    } else if (SHELL.includes(url.pathname)) {
+        // Statiques : réponse immédiate depuis le cache, mise à jour en arrière-plan
+        event.respondWith(
+            caches.open(CACHE_NAME).then(cache =>
+                cache.match(event.request, { ignoreSearch: true }).then(cached => {
+                    const network = fetch(event.request)
+                        .then(response => {
+                            if (response.ok) cache.put(event.request, response.clone());
+                            return response;
+                        })
+                        .catch(() => cached);
+                    return cached || network;
+                })
+            )
+        );
+    }
+});
@@ -0,0 +1,88 @@
+// static/js/transcript-cache.js
+//
+// Cache local (IndexedDB) de la transcription affichée par le viewer.
+// Une entrée par message final, clé [room, id] où room = "<conversation>:<langues>"
+// (un mobile qui n'affiche qu'une langue ne reçoit que celle-ci).
+
+class TranscriptCache {
+    constructor(dbName = 'live-translation') {
+        this.dbPromise = this._open(dbName);
+    }
+
+    static room(conversationId, languages) {
+        return `${conversationId}:${[...languages].sort().join(',')}`;
+    }
+
+    // Conversation affichée lors de la dernière visite
+    get conversationId() {
+        const value = localStorage.getItem('transcript:conversation_id');
+        return value === null ? null : Number(value);
+    }
+
+    set conversationId(value) {
+        localStorage.setItem('transcript:conversation_id', String(value));
+    }
+
+    _open(name) {
+        return new Promise((resolve) => {
+            // Navigation privée, navigateur ancien... : on fonctionne sans cache
+            if (!('indexedDB' in window)) return resolve(null);
+            const request = indexedDB.open(name, 1);
+            request.onupgradeneeded = () => {
+                request.result.createObjectStore('messages', { keyPath: ['room', 'id'] });
+            };
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => resolve(null);
+        });
+    }
+
+    _roomRange(room) {
+        return IDBKeyRange.bound([room, -Infinity], [room, Infinity]);
+    }
+
+    async _store(mode) {
+        const db = await this.dbPromise;
+        return db ? db.transaction('messages', mode).objectStore('messages') : null;
+    }
+
+    _done(request) {
+        return new Promise((resolve) => {
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => resolve(null);
+        });
+    }
+
+    // Messages d'une room, triés par id
+    async load(room) {
+        const store = await this._store('readonly');
+        if (!store) return [];
+        return (await this._done(store.getAll(this._roomRange(room)))) || [];
+    }
+
+    async put(room, messages) {
+        if (!messages.length) return;
+        const store = await this._store('readwrite');
+        if (!store) return;
+        messages.forEach(msg => store.put({ ...msg, room }));
+    }
+
+    async clear(room) {
+        const store = await this._store('readwrite');
+        if (store) await this._done(store.delete(this._roomRange(room)));
+    }
+
+    // Ne garde que la conversation en cours (toutes langues confondues)
+    async retain(conversationId) {
+        this.conversationId = conversationId;
+        const store = await this._store('readwrite');
+        if (!store) return;
+        const prefix = `${conversationId}:`;
+        const request = store.openKeyCursor();
+        request.onsuccess = () => {
+            const cursor = request.result;
+            if (!cursor) return;
+            if (!cursor.key[0].startsWith(prefix)) store.delete(cursor.primaryKey);
+            cursor.continue();
+        };
+    }
+}
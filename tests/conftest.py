@@ -0,0 +1,23 @@
+import asyncio
+
+import pytest
+
+import database
+
+
+@pytest.fixture
+def run_db(tmp_path):
+    """Exécute une coroutine sur une base SQLite temporaire initialisée (init_db)"""
+
+    def run(body, url=None):
+        async def main():
+            database.configure_engine(url or f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+            await database.init_db()
+            try:
+                return await body()
+            finally:
+                await database.dispose_engine()
+
+        return asyncio.run(main())
+
+    return run
@@ -0,0 +1,40 @@
+from datetime import datetime
+
+import archive
+import database
+
+
+def test_archived_pages_match_hot_pages(run_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path / "archive"))
+
+    async def body():
+        conv = await database.create_conversation("ancienne")
+        # Ids et horodatages dans des ordres différents (ex: finals sauvegardés en parallèle)
+        for message_id, minute in ((1, 5), (2, 1), (3, 3)):
+            await database.add_message(
+                conv.id,
+                {"fr": f"message {message_id}", "es": f"mensaje {message_id}"},
+                "fr-FR",
+                datetime(2025, 1, 1, 10, minute),
+                message_id=message_id,
+            )
+        hot = await database.get_message_page(conv.id, 0, 2)
+        hot_next = await database.get_message_page(conv.id, hot[1], 2)
+
+        path = await archive.export_conversation(conv)
+        assert await database.mark_conversation_archived(conv.id, path)
+        database.query_cache.clear()
+        archived = await archive.get_archived_page(conv.id, path, 0, 2)
+        archived_next = await archive.get_archived_page(conv.id, path, archived[1], 2)
+        return hot, hot_next, archived, archived_next
+
+    hot, hot_next, archived, archived_next = run_db(body)
+    assert archived == hot
+    assert archived_next == hot_next
+
+
+def test_mark_unknown_conversation_archived(run_db):
+    async def body():
+        return await database.mark_conversation_archived(404, "absent.jsonl.gz")
+
+    assert run_db(body) is False
@@ -0,0 +1,86 @@
+import json
+from collections import deque
+from datetime import datetime
+
+import pytest
+
+import app
+import checkpoint
+import database
+
+
+@pytest.fixture
+def snapshot_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "live_state.json")
+    monkeypatch.setattr(app, "load_snapshot", lambda: checkpoint.load_snapshot(path))
+    monkeypatch.setattr(app, "history", deque(maxlen=app.HISTORY_WINDOW))
+    monkeypatch.setattr(app, "live_interim", None)
+    monkeypatch.setattr(app, "CURRENT_SESSION_ID", 0)
+    monkeypatch.setitem(app.sid_registry, "recognition_state", False)
+    return path
+
+
+async def _live_conversation():
+    conv = await database.create_conversation("live")
+    for i in range(3):
+        msg = await database.add_message(
+            conv.id, {"fr": f"phrase {i}", "es": f"frase {i}"}, "fr-FR", datetime(2025, 1, 1, 10, i)
+        )
+        app.add_to_history(msg.to_dict())
+    app.CURRENT_SESSION_ID = conv.id
+    app.live_interim = {"translations": {"fr": "en cours", "es": "en curso"}, "is_final": False}
+    app.sid_registry["recognition_state"] = True
+    return conv
+
+
+def _reset_live_state():
+    app.history = deque(maxlen=app.HISTORY_WINDOW)
+    app.live_interim = None
+    app.CURRENT_SESSION_ID = 0
+    app.sid_registry["recognition_state"] = False
+
+
+def test_snapshot_round_trip(run_db, snapshot_path):
+    async def body():
+        conv = await _live_conversation()
+        expected = (list(app.history), app.live_interim)
+        checkpoint.save_snapshot(app.live_state_snapshot(), snapshot_path)
+        _reset_live_state()
+        restored = await app.restore_live_state()
+        return conv.id, restored, expected
+
+    conversation_id, restored, (history, interim) = run_db(body)
+    assert restored
+    assert app.CURRENT_SESSION_ID == conversation_id
+    assert list(app.history) == history
+    assert app.live_interim == interim
+    assert app.sid_registry["recognition_state"] is True
+
+
+def test_snapshot_behind_the_database_is_ignored(run_db, snapshot_path):
+    async def body():
+        conv = await _live_conversation()
+        checkpoint.save_snapshot(app.live_state_snapshot(), snapshot_path)
+        # Message sauvegardé après le snapshot (ex: autre processus)
+        await database.add_message(conv.id, {"fr": "après", "es": "después"}, "fr-FR", datetime.now())
+        _reset_live_state()
+        return await app.restore_live_state()
+
+    assert run_db(body) is False
+
+
+def test_old_or_foreign_snapshots_are_ignored(tmp_path, monkeypatch):
+    path = str(tmp_path / "live_state.json")
+    checkpoint.save_snapshot({"conversation_id": 1}, path)
+    assert checkpoint.load_snapshot(path)["conversation_id"] == 1
+
+    with open(path) as f:
+        snapshot = json.load(f)
+    with open(path, "w") as f:
+        json.dump({**snapshot, "version": checkpoint.CHECKPOINT_VERSION + 1}, f)
+    assert checkpoint.load_snapshot(path) is None
+
+    checkpoint.save_snapshot({"conversation_id": 1}, path)
+    monkeypatch.setattr(checkpoint, "CHECKPOINT_MAX_AGE", -1)
+    assert checkpoint.load_snapshot(path) is None
+    assert checkpoint.load_snapshot(str(tmp_path / "absent.json")) is None
@@ -0,0 +1,69 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import database
+
+BASE = datetime(2025, 1, 1, 10, 0)
+
+
+def _message(fr: str, language: str, timestamp: datetime) -> dict:
+    return {
+        "translations": {"fr": fr, "es": f"es: {fr}"},
+        "source_language": language,
+        "timestamp": timestamp,
+    }
+
+
+def _aggregates(conv) -> dict:
+    return {
+        "message_count": conv.message_count,
+        "word_count": conv.word_count,
+        "first_message_at": conv.first_message_at,
+        "last_message_at": conv.last_message_at,
+        "language_counts": conv.language_counts,
+    }
+
+
+async def _conversation(conversation_id: int):
+    return next(c for c in await database.get_conversations() if c.id == conversation_id)
+
+
+def test_aggregates_after_inserts_match_rebuild(run_db):
+    async def body():
+        conv = await database.create_conversation("test")
+        # Finals concurrents : l'UPDATE SQL ne perd aucun incrément
+        await asyncio.gather(*(
+            database.add_message(conv.id, **_message("un deux trois", "fr-FR", BASE + timedelta(minutes=i)))
+            for i in range(10)
+        ))
+        await database.add_messages(conv.id, [
+            _message("hola", "es-MX", BASE - timedelta(minutes=5)),
+            _message("quatre cinq", "fr-FR", BASE + timedelta(hours=1)),
+        ])
+        after_inserts = _aggregates(await _conversation(conv.id))
+        await database.rebuild_conversation_stats()
+        return after_inserts, _aggregates(await _conversation(conv.id))
+
+    after_inserts, rebuilt = run_db(body)
+    assert after_inserts == {
+        "message_count": 12,
+        # Mots du texte dans la langue parlée : "es: hola" pour es-MX
+        "word_count": 10 * 3 + 2 + 2,
+        "first_message_at": BASE - timedelta(minutes=5),
+        "last_message_at": BASE + timedelta(hours=1),
+        "language_counts": {"fr-FR": 11, "es-MX": 1},
+    }
+    assert rebuilt == after_inserts
+
+
+def test_aware_timestamps_are_stored_in_local_time(run_db):
+    aware = datetime(2025, 1, 1, 9, 0, tzinfo=timezone.utc)
+
+    async def body():
+        conv = await database.create_conversation("test")
+        await database.add_message(conv.id, **_message("bonjour", "fr-FR", aware))
+        return await _conversation(conv.id)
+
+    conv = run_db(body)
+    expected = aware.astimezone().replace(tzinfo=None)
+    assert conv.first_message_at == conv.last_message_at == expected
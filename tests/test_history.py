@@ -0,0 +1,55 @@
+from collections import deque
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def window(monkeypatch):
+    monkeypatch.setattr(app, "history", deque(maxlen=4))
+    monkeypatch.setattr(app, "CURRENT_SESSION_ID", 7)
+
+
+def _ids():
+    return [msg["id"] for msg in app.history]
+
+
+def _add(*ids):
+    for message_id in ids:
+        app.add_to_history({"id": message_id})
+
+
+def test_out_of_order_finals_keep_id_order(window):
+    # Deux finals sauvegardés en parallèle : le 3 arrive après le 4
+    _add(1, 2, 4, 3)
+    assert _ids() == [1, 2, 3, 4]
+
+
+def test_full_window_drops_the_oldest(window):
+    _add(1, 2, 4, 5, 3)
+    assert _ids() == [2, 3, 4, 5]
+    # Plus ancien que toute la fenêtre : ignoré
+    _add(1)
+    assert _ids() == [2, 3, 4, 5]
+    _add(6)
+    assert _ids() == [3, 4, 5, 6]
+
+
+def test_resume_after_id_returns_only_newer_messages(window):
+    _add(10, 11, 12, 13)
+    messages, after_id = app.history_since(7, 11)
+    assert [msg["id"] for msg in messages] == [12, 13]
+    assert after_id == 11
+    assert app.history_since(7, 13) == ([], 13)
+
+
+def test_full_history_when_resume_is_not_possible(window):
+    _add(10, 11, 12, 13)
+    full = list(app.history)
+    # Autre conversation, after_id absent, ou plus récent que l'historique
+    assert app.history_since(8, 11) == (full, None)
+    assert app.history_since(7, None) == (full, None)
+    assert app.history_since(7, 20) == (full, None)
+    # Messages manquants : after_id sorti de la fenêtre pleine
+    assert app.history_since(7, 5) == (full, None)
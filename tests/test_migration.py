@@ -0,0 +1,69 @@
+import sqlite3
+
+import pytest
+
+import database
+
+LEGACY_SCHEMA = """
+CREATE TABLE conversation (
+    id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, created_at DATETIME NOT NULL
+);
+CREATE TABLE message (
+    id INTEGER PRIMARY KEY,
+    conversation_id INTEGER NOT NULL REFERENCES conversation (id),
+    fr VARCHAR NOT NULL,
+    es VARCHAR NOT NULL,
+    timestamp DATETIME NOT NULL,
+    source_language VARCHAR NOT NULL
+);
+INSERT INTO conversation VALUES (1, 'ancienne', '2024-06-01 09:00:00.000000');
+INSERT INTO message VALUES (1, 1, 'Bonjour à tous', 'Hola a todos', '2024-06-01 09:00:00.000000', 'fr-FR');
+INSERT INTO message VALUES (2, 1, 'Merci', 'Gracias amigos', '2024-06-01 09:05:00.000000', 'es-MX');
+"""
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    path = tmp_path / "legacy.db"
+    with sqlite3.connect(path) as conn:
+        conn.executescript(LEGACY_SCHEMA)
+    return f"sqlite+aiosqlite:///{path}", path
+
+
+def test_legacy_fr_es_columns_are_migrated(run_db, legacy_db):
+    url, path = legacy_db
+
+    async def body():
+        messages = await database.get_messages_by_conversation(1)
+        conv = await database.get_conversation_by_id(1)
+        return [m.to_dict() for m in messages], conv
+
+    messages, conv = run_db(body, url)
+    assert [m["translations"] for m in messages] == [
+        {"fr": "Bonjour à tous", "es": "Hola a todos"},
+        {"fr": "Merci", "es": "Gracias amigos"},
+    ]
+    # Agrégats remplis pour les colonnes ajoutées à la conversation existante
+    assert conv.message_count == 2
+    assert conv.word_count == 3 + 2
+    assert conv.language_counts == {"fr-FR": 1, "es-MX": 1}
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == database.SCHEMA_VERSION
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert "message_legacy" not in tables
+
+
+def test_up_to_date_schema_skips_inspection(run_db, tmp_path, monkeypatch):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'current.db'}"
+
+    async def nothing():
+        return None
+
+    run_db(nothing, url)  # création du schéma, user_version à jour
+
+    def fail(*args):
+        raise AssertionError("inspection du schéma au démarrage")
+
+    monkeypatch.setattr(database, "_has_legacy_message_table", fail)
+    monkeypatch.setattr(database, "_add_conversation_columns", fail)
+    run_db(nothing, url)
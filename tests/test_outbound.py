@@ -0,0 +1,75 @@
+import asyncio
+
+from outbound import FINAL, INTERIM, OutboundScheduler
+
+
+class FakeSio:
+    def __init__(self):
+        self.emitted = []
+
+    async def emit(self, event, data=None, **kwargs):
+        self.emitted.append((event, data, kwargs.get("room")))
+
+
+async def _drain(scheduler, enqueue):
+    sio = FakeSio()
+    scheduler.start(sio)
+    enqueue()
+    # Laisse la tâche de fond vider les files
+    for _ in range(20):
+        await asyncio.sleep(0)
+    await scheduler.stop()
+    return sio.emitted
+
+
+def test_interims_are_coalesced_per_room():
+    scheduler = OutboundScheduler()
+
+    def enqueue():
+        for i in range(3):
+            scheduler.send_interim("transcript", {"text": f"fr {i}"}, "fr", room="fr")
+            scheduler.send_interim("transcript", {"text": f"es {i}"}, "es", room="es")
+
+    emitted = asyncio.run(_drain(scheduler, enqueue))
+    assert emitted == [
+        ("transcript", {"text": "fr 2"}, "fr"),
+        ("transcript", {"text": "es 2"}, "es"),
+    ]
+    assert scheduler.stats[INTERIM].sent == 2
+    assert scheduler.stats[INTERIM].dropped == 4
+
+
+def test_finals_are_fifo_and_cancel_the_pending_interim():
+    scheduler = OutboundScheduler()
+
+    def enqueue():
+        scheduler.send_interim("transcript", {"text": "en cours"}, "fr", room="fr")
+        scheduler.send_interim("transcript", {"text": "en curso"}, "es", room="es")
+        for i in range(3):
+            scheduler.send_final("transcript", {"id": i}, "fr", room="fr")
+
+    emitted = asyncio.run(_drain(scheduler, enqueue))
+    # Les finals passent avant l'intermédiaire restant, dans l'ordre d'arrivée
+    assert emitted == [
+        ("transcript", {"id": 0}, "fr"),
+        ("transcript", {"id": 1}, "fr"),
+        ("transcript", {"id": 2}, "fr"),
+        ("transcript", {"text": "en curso"}, "es"),
+    ]
+    assert scheduler.stats[FINAL].sent == 3
+    assert scheduler.stats[INTERIM].dropped == 1
+
+
+def test_stop_flushes_queued_finals():
+    scheduler = OutboundScheduler()
+
+    async def main():
+        sio = FakeSio()
+        scheduler.start(sio)
+        scheduler.send_interim("transcript", {"text": "en cours"}, "fr", room="fr")
+        scheduler.send_final("transcript", {"id": 1}, "es", room="es")
+        # Arrêt avant que la tâche de fond ait tourné
+        await scheduler.stop()
+        return sio.emitted
+
+    assert asyncio.run(main()) == [("transcript", {"id": 1}, "es")]
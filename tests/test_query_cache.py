@@ -0,0 +1,71 @@
+import json
+from datetime import datetime
+
+import database
+from database import ByteLRUCache
+
+
+def _message(text: str) -> dict:
+    return {
+        "translations": {"fr": text, "es": text},
+        "source_language": "fr-FR",
+        "timestamp": datetime(2025, 1, 1, 10, 0),
+    }
+
+
+def test_invalidate_conversation_only_drops_its_entries():
+    cache = ByteLRUCache(1000)
+    cache.put(("messages", 1, 0, 10), "a", 10)
+    cache.put(("conversation", 1), "b", 10)
+    cache.put(("messages", 2, 0, 10), "c", 10)
+    cache.put(("conversation_list",), "d", 10)
+    cache.invalidate_conversation(1)
+    assert cache.get(("messages", 1, 0, 10)) is None
+    assert cache.get(("conversation", 1)) is None
+    assert cache.get(("messages", 2, 0, 10)) == "c"
+    assert cache.bytes == 20
+
+
+def test_eviction_keeps_index_consistent():
+    cache = ByteLRUCache(30)
+    for after_id in range(5):
+        cache.put(("messages", 1, after_id, 10), after_id, 10)
+    assert cache.bytes == 30
+    cache.invalidate_conversation(1)
+    assert cache.bytes == 0
+    assert cache.stats()["entries"] == 0
+
+
+def test_writes_invalidate_cached_pages_and_list(run_db):
+    async def body():
+        conv = await database.create_conversation("test")
+        await database.add_message(conv.id, **_message("un"))
+        body_before, _, count_before = await database.get_message_page(conv.id)
+        listed = await database.get_conversation_list()
+        assert count_before == 1 and listed[0]["message_count"] == 1
+
+        await database.add_messages(conv.id, [_message("deux"), _message("trois")])
+        body_after, _, count_after = await database.get_message_page(conv.id)
+        listed = await database.get_conversation_list()
+        return body_before, body_after, count_after, listed
+
+    body_before, body_after, count_after, listed = run_db(body)
+    assert count_after == 3
+    assert body_after.startswith(body_before)
+    assert [json.loads(line)["translations"]["fr"] for line in body_after.splitlines()] == [
+        "un", "deux", "trois"
+    ]
+    assert listed[0]["message_count"] == 3
+
+
+def test_conversation_list_returns_a_copy(run_db):
+    async def body():
+        await database.create_conversation("test")
+        first = await database.get_conversation_list()
+        first[0]["title"] = "modifié"
+        first[0]["language_counts"]["xx"] = 1
+        return await database.get_conversation_list()
+
+    listed = run_db(body)
+    assert listed[0]["title"] == "test"
+    assert listed[0]["language_counts"] == {}
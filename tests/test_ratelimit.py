@@ -0,0 +1,36 @@
+from ratelimit import RateLimiter, client_ip, environ_client_ip
+
+
+def _environ(peer, forwarded_for=""):
+    # Comme le pilote ASGI d'engine.io : REMOTE_ADDR fixe, vrai pair dans le scope
+    return {
+        "REMOTE_ADDR": "127.0.0.1",
+        "HTTP_X_FORWARDED_FOR": forwarded_for,
+        "asgi.scope": {"client": (peer, 51234)},
+    }
+
+
+def test_spoofed_forwarded_for_from_untrusted_peer_is_ignored():
+    assert environ_client_ip(_environ("203.0.113.7", "198.51.100.1")) == "203.0.113.7"
+    assert client_ip("198.51.100.1", "203.0.113.7") == "203.0.113.7"
+
+
+def test_forwarded_for_from_trusted_proxy():
+    # Le client a ajouté une fausse IP devant : seule celle ajoutée par nginx compte
+    assert environ_client_ip(_environ("127.0.0.1", "6.6.6.6, 203.0.113.7")) == "203.0.113.7"
+
+
+def test_peers_get_separate_buckets():
+    limiter = RateLimiter("connect", "1/60")
+    first = environ_client_ip(_environ("203.0.113.7"))
+    second = environ_client_ip(_environ("203.0.113.8", "203.0.113.7"))
+    assert limiter.check(f"ip:{first}") == 0
+    assert limiter.check(f"ip:{second}") == 0
+    assert limiter.check(f"ip:{first}") > 0
+
+
+def test_check_consumes_only_when_every_key_allows():
+    limiter = RateLimiter("token", "1/60")
+    assert limiter.check("ip:a") == 0
+    assert limiter.check("ip:a", "session") > 0
+    assert limiter.check("session") == 0
@@ -0,0 +1,64 @@
+import asyncio
+
+import translation
+from translation import FakeTranslator, TranslationStage
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _with_stage(translator, body):
+    stage = TranslationStage()
+    stage.start(["fr", "de", "it"], translator)
+    try:
+        return await body(stage)
+    finally:
+        await stage.stop()
+
+
+def test_requests_are_batched():
+    translator = FakeTranslator()
+
+    async def body(stage):
+        return await asyncio.gather(
+            stage.translate("Bonjour", "fr-FR"),
+            stage.translate("Merci", "fr-FR"),
+            stage.translate("Bonjour", "fr-FR"),  # en attente : envoyé une seule fois
+        )
+
+    results = run(_with_stage(translator, body))
+    assert translator.calls == 1
+    assert results[0] == {"fr": "Bonjour", "de": "[de] Bonjour", "it": "[it] Bonjour"}
+    assert results[1]["de"] == "[de] Merci"
+    assert results[2] == results[0]
+
+
+def test_translation_memory():
+    translator = FakeTranslator()
+
+    async def body(stage):
+        await stage.translate("Bonjour à tous", "fr-FR")
+        # Même texte normalisé : servi par la mémoire, sans appel au traducteur
+        cached = await stage.translate("  bonjour  À TOUS ", "fr-FR")
+        await stage.translate("Au revoir", "fr-FR", remember=False)
+        await stage.translate("Au revoir", "fr-FR", remember=False)
+        return cached, stage.stats()
+
+    cached, stats = run(_with_stage(translator, body))
+    assert cached["de"] == "[de] Bonjour à tous"
+    assert translator.calls == 3
+    assert stats["memory"]["entries"] == 2
+    assert stats["memory"]["hits"] == 2
+
+
+def test_timeout_leaves_languages_out(monkeypatch):
+    monkeypatch.setattr(translation, "TRANSLATION_TIMEOUT", 0.05)
+    translator = FakeTranslator(delay=0.5)
+
+    async def body(stage):
+        return await stage.translate("Bonjour", "fr-FR"), stage.stats()
+
+    result, stats = run(_with_stage(translator, body))
+    assert result == {"fr": "Bonjour"}
+    assert stats["timeouts"] == 1
@@ -0,0 +1,309 @@
+"""
+Traduction côté serveur vers des langues supplémentaires (EXTRA_LANGUAGES).
+
+Le recognizer Azure du master ne traduit que vers TARGET_LANGUAGES : chaque
+cible en plus augmente le coût à la minute et la charge du navigateur. Les
+autres langues sont traduites ici, à partir du texte reconnu :
+    - traducteur interchangeable (TRANSLATOR=azure, ou fake pour les essais)
+    - micro-lots : les demandes reçues pendant TRANSLATION_BATCH_WINDOW
+      secondes, ou pendant le lot précédent, partent en une seule requête
+    - mémoire de traduction LRU bornée, clé = texte source normalisé : une
+      cérémonie répète beaucoup de phrases
+Une traduction qui échoue ou dépasse TRANSLATION_TIMEOUT est absente du
+résultat : le message est diffusé quand même dans les autres langues.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import deque
+
+from database import ByteLRUCache
+from metrics import percentile
+
+TRANSLATOR = os.environ.get("TRANSLATOR", "azure")
+TRANSLATOR_KEY = os.environ.get("TRANSLATOR_KEY")
+TRANSLATOR_REGION = os.environ.get("TRANSLATOR_REGION") or os.environ.get("SPEECH_REGION")
+TRANSLATOR_ENDPOINT = os.environ.get(
+    "TRANSLATOR_ENDPOINT", "https://api.cognitive.microsofttranslator.com"
+).rstrip("/")
+
+TRANSLATION_BATCH_WINDOW = float(os.environ.get("TRANSLATION_BATCH_WINDOW", "0.02"))
+TRANSLATION_BATCH_MAX = int(os.environ.get("TRANSLATION_BATCH_MAX", "50"))
+# Limite Azure : 50 000 caractères par requête, toutes langues cibles comprises
+TRANSLATION_BATCH_MAX_CHARS = 40_000
+TRANSLATION_TIMEOUT = float(os.environ.get("TRANSLATION_TIMEOUT", "3"))
+TRANSLATION_MEMORY_BYTES = int(os.environ.get("TRANSLATION_MEMORY_BYTES", str(4 * 1024 * 1024)))
+# Intervalle minimum entre deux traductions d'intermédiaires (0 : finals seulement)
+INTERIM_TRANSLATION_INTERVAL = float(os.environ.get("INTERIM_TRANSLATION_INTERVAL", "0"))
+# Latences de lot gardées pour les percentiles de /api/translation-stats
+LATENCY_SAMPLES = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(text: str) -> str:
+    """Clé de la mémoire de traduction : formes Unicode, casse et espaces unifiés"""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def base_language(language: str) -> str:
+    return language.lower().split("-")[0]
+
+
+# --- Traducteurs ---
+
+
+class Translator(ABC):
+    """Traduit un lot de textes d'une même langue source vers plusieurs langues cibles"""
+
+    name = "base"
+
+    @abstractmethod
+    async def translate(self, texts: list[str], source: str, targets: list[str]) -> list[dict[str, str]]:
+        """Une entrée par texte, dans l'ordre : {langue cible: traduction}"""
+
+    async def close(self):
+        pass
+
+
+class FakeTranslator(Translator):
+    """Traducteur local et déterministe ("[de] texte"), pour les essais et les benchmarks"""
+
+    name = "fake"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def translate(self, texts, source, targets):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return [{target: f"[{target}] {text}" for target in targets} for text in texts]
+
+
+class AzureTranslator(Translator):
+    """Azure AI Translator (API texte v3), une requête HTTP par lot"""
+
+    name = "azure"
+
+    def __init__(self, key: str, region: str | None, endpoint: str = TRANSLATOR_ENDPOINT):
+        self.key = key
+        self.region = region
+        self.endpoint = endpoint
+        self._client = None
+
+    async def translate(self, texts, source, targets):
+        # Import différé : httpx n'est chargé que si la traduction serveur est active
+        import httpx
+
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=TRANSLATION_TIMEOUT)
+        headers = {"Ocp-Apim-Subscription-Key": self.key}
+        if self.region:
+            headers["Ocp-Apim-Subscription-Region"] = self.region
+        params = [("api-version", "3.0")] + [("to", target) for target in targets]
+        # Langue non détectée par le recognizer : Azure la détecte
+        if source != "unknown":
+            params.append(("from", source))
+        response = await self._client.post(
+            f"{self.endpoint}/translate",
+            params=params,
+            headers=headers,
+            json=[{"Text": text} for text in texts],
+        )
+        response.raise_for_status()
+        return [
+            {item["to"]: item["text"] for item in result["translations"]}
+            for result in response.json()
+        ]
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def create_translator(name: str = TRANSLATOR) -> Translator:
+    if name == "fake":
+        return FakeTranslator(delay=float(os.environ.get("FAKE_TRANSLATOR_DELAY", "0")))
+    if name == "azure":
+        if not TRANSLATOR_KEY:
+            raise RuntimeError("EXTRA_LANGUAGES nécessite TRANSLATOR_KEY (ou TRANSLATOR=fake)")
+        return AzureTranslator(TRANSLATOR_KEY, TRANSLATOR_REGION)
+    raise RuntimeError(f"Traducteur inconnu: {name}")
+
+
+# --- Étape de traduction ---
+
+
+class _Request:
+    __slots__ = ("source", "key", "text", "future", "remember")
+
+    def __init__(self, source, key, text, future, remember):
+        self.source = source
+        self.key = key
+        self.text = text
+        self.future = future
+        self.remember = remember
+
+
+class TranslationStage:
+    def __init__(self):
+        self.translator: Translator | None = None
+        self.targets: list[str] = []
+        # Mémoire de traduction : (langue source, langue cible, texte normalisé) -> traduction
+        self.memory = ByteLRUCache(TRANSLATION_MEMORY_BYTES)
+        self.batches = 0
+        self.texts = 0
+        self.errors = 0  # lots en échec
+        self.timeouts = 0  # demandes sans réponse après TRANSLATION_TIMEOUT
+        self.latencies: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._queue: deque[_Request] = deque()
+        # Demandes en attente par (langue source, texte normalisé) : une phrase
+        # répétée avant le retour de sa traduction n'est envoyée qu'une fois
+        self._pending: dict[tuple[str, str], _Request] = {}
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def translate(self, text: str, source_language: str, remember: bool = True) -> dict[str, str]:
+        """
+        Traductions de text vers les langues cibles ; une langue en échec ou hors
+        délai est absente du résultat.
+        remember=False (intermédiaires) : résultat non gardé en mémoire de traduction.
+        """
+        source = base_language(source_language)
+        key = normalize(text)
+        result = {}
+        missing = []
+        for target in self.targets:
+            if base_language(target) == source:
+                result[target] = text
+                continue
+            cached = self.memory.get((source, target, key))
+            if cached is None:
+                missing.append(target)
+            else:
+                result[target] = cached
+        if not missing or not key:
+            return result
+
+        request = self._pending.get((source, key))
+        if request is None:
+            request = _Request(source, key, text, asyncio.get_running_loop().create_future(), remember)
+            self._pending[(source, key)] = request
+            self._queue.append(request)
+            self._wakeup.set()
+        else:
+            request.remember = request.remember or remember
+        try:
+            translated = await asyncio.wait_for(asyncio.shield(request.future), TRANSLATION_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            translated = {}
+        result.update({target: translated[target] for target in missing if translated.get(target)})
+        return result
+
+    def _take_batch(self) -> list[_Request]:
+        """Demandes de la même langue source que la plus ancienne, dans les limites d'un lot"""
+        source = self._queue[0].source
+        targets = sum(1 for target in self.targets if base_language(target) != source) or 1
+        batch, rest, chars = [], deque(), 0
+        while self._queue:
+            request = self._queue.popleft()
+            size = len(request.text) * targets
+            if (
+                request.source != source
+                or len(batch) >= TRANSLATION_BATCH_MAX
+                or (batch and chars + size > TRANSLATION_BATCH_MAX_CHARS)
+            ):
+                rest.append(request)
+                continue
+            batch.append(request)
+            chars += size
+        self._queue = rest
+        return batch
+
+    async def _translate_batch(self, batch: list[_Request]):
+        source = batch[0].source
+        targets = [target for target in self.targets if base_language(target) != source]
+        start = time.perf_counter()
+        try:
+            results = await self.translator.translate([r.text for r in batch], source, targets)
+        except Exception as e:
+            self.errors += 1
+            logger.error("Erreur de traduction (%s, %d textes): %s", source, len(batch), e)
+            results = [{} for _ in batch]
+        else:
+            self.batches += 1
+            self.texts += len(batch)
+            self.latencies.append(time.perf_counter() - start)
+
+        for request, translated in zip(batch, results):
+            if request.remember:
+                for target, text in translated.items():
+                    if text:
+                        self.memory.put(
+                            (source, target, request.key),
+                            text,
+                            len(request.key.encode()) + len(text.encode()) + 64,
+                        )
+            self._pending.pop((source, request.key), None)
+            if not request.future.done():
+                request.future.set_result(translated)
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            # Fenêtre de regroupement : les demandes arrivées entre-temps partent dans le même lot
+            await asyncio.sleep(TRANSLATION_BATCH_WINDOW)
+            self._wakeup.clear()
+            while self._queue:
+                await self._translate_batch(self._take_batch())
+
+    # --- Cycle de vie ---
+
+    def start(self, targets: list[str], translator: Translator | None = None):
+        self.targets = list(targets)
+        self.translator = translator or create_translator()
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info("Traduction serveur (%s) vers %s", self.translator.name, ",".join(self.targets))
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        for request in self._pending.values():
+            if not request.future.done():
+                request.future.set_result({})
+        self._queue.clear()
+        self._pending.clear()
+        await self.translator.close()
+
+    def stats(self) -> dict:
+        return {
+            "translator": self.translator.name if self.translator else None,
+            "targets": self.targets,
+            "queued": len(self._queue),
+            "texts": self.texts,
+            "batches": self.batches,
+            "avg_batch_size": round(self.texts / self.batches, 2) if self.batches else 0,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "latency_p50_ms": round(percentile(self.latencies, 0.5) * 1000, 3),
+            "latency_p95_ms": round(percentile(self.latencies, 0.95) * 1000, 3),
+            "memory": self.memory.stats(),
+        }
+
+
+translation_stage = TranslationStage()